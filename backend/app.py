@@ -1,4 +1,4 @@
-from flask import Flask, send_from_directory, session
+from flask import Flask, session
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
@@ -10,22 +10,61 @@ from routes.admin import admin_bp
 from routes.banners import banners_bp
 from routes.newsletter import newsletter_bp
 from routes.gallery import gallery_bp
+from routes.home import home_bp
 from database.seeder import initialize_database
+from config.database import release_request_connection
+from services.cache_listener import start_cache_listener
+from services.image_worker import start_image_worker
+from services.email_worker import start_email_worker
+from services.newsletter_sender import start_newsletter_sender
+from utils.json_provider import FastJSONProvider
+from utils.compression import compress_response
+from utils.static_files import serve_static_file
 
 load_dotenv()
 
-# Initialize database on startup
-initialize_database()
+# Initialize database on startup (not again in image worker processes, which re-import this module as __mp_main__)
+if __name__ != '__mp_main__':
+    initialize_database()
 
 app = Flask(__name__)
 app.url_map.strict_slashes = False
 
+# Serialize JSON responses with orjson when available (same output format as jsonify)
+app.json = FastJSONProvider(app)
+
 # Configure session
 app.secret_key = os.getenv('SECRET_KEY', 'your-super-secret-key-for-sessions')
 
 # Simple CORS - allow everything for development
 CORS(app, supports_credentials=True)
 
+# Share one pooled DB connection per request and release it afterwards
+app.teardown_request(release_request_connection)
+
+# Evict cached catalog data when any process changes it (PostgreSQL LISTEN/NOTIFY)
+@app.before_request
+def ensure_cache_listener():
+    start_cache_listener()
+
+# Generate image variants in background processes instead of inside upload requests
+@app.before_request
+def ensure_image_worker():
+    start_image_worker()
+
+# Send order emails from the outbox with a bounded pool of sender threads
+@app.before_request
+def ensure_email_worker():
+    start_email_worker()
+
+# Deliver started newsletter campaigns in the background
+@app.before_request
+def ensure_newsletter_sender():
+    start_newsletter_sender()
+
+# gzip/brotli-encode JSON and text assets for clients that accept it
+app.after_request(compress_response)
+
 # Register blueprints
 app.register_blueprint(products_bp, url_prefix='/api/products')
 app.register_blueprint(categories_bp, url_prefix='/api/categories')
@@ -34,6 +73,7 @@ app.register_blueprint(admin_bp, url_prefix='/api/admin')
 app.register_blueprint(banners_bp, url_prefix='/api/banners')
 app.register_blueprint(newsletter_bp, url_prefix='/api/newsletter')
 app.register_blueprint(gallery_bp, url_prefix='/api/gallery')
+app.register_blueprint(home_bp, url_prefix='/api/home')
 
 @app.route('/')
 def home():
@@ -52,10 +92,10 @@ def debug_session():
         'admin_email': session.get('admin_email', 'Not set')
     }
 
-# Serve static files (images)
+# Serve static files (images); immutable caching for ?v=<content hash> URLs
 @app.route('/<path:filename>')
 def serve_static(filename):
-    return send_from_directory('static', filename)
+    return serve_static_file(filename)
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
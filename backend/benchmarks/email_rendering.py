@@ -0,0 +1,137 @@
+"""
+Compare rendering order emails with the compiled templates in
+services/email_templates against the previous approach of rebuilding the
+whole document with f-strings and += per item.
+
+The previous code built the HTML part only and escaped nothing; the
+templates also build the plain-text part and escape every value, so the
+comparison includes that extra work. Nothing is memoized: every render
+formats and fills its rows from scratch.
+
+    python benchmarks/email_rendering.py [--items 5] [--repeat 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.email_templates import render_admin_notification, render_order_confirmation
+
+
+def build_items(count):
+    return [{
+        'name': f'Damascus Chef Knife {i}',
+        'price': str(14999 + i),
+        'quantity': 1 + i % 3
+    } for i in range(count)]
+
+
+def legacy_format_price(price):
+    """format_price as EmailService defined it before the template layer"""
+    if price % 1 == 0:
+        return f"PKR {int(price):,}"
+    else:
+        return f"PKR {price:,.2f}"
+
+
+def legacy_order_confirmation(customer_name, order_number, items, total_amount, payment_method='COD'):
+    """The confirmation body as EmailService built it before the template layer"""
+    html_body = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+            .header {{ background-color: #ea580c; color: white; padding: 20px; text-align: center; }}
+            .content {{ background-color: #f9fafb; padding: 30px; }}
+            .order-details {{ background-color: white; padding: 20px; margin: 20px 0; border-radius: 8px; }}
+            .item {{ padding: 10px 0; border-bottom: 1px solid #e5e7eb; }}
+            .total {{ font-size: 20px; font-weight: bold; color: #ea580c; margin-top: 20px; }}
+            .footer {{ text-align: center; padding: 20px; color: #6b7280; font-size: 14px; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>Sharp Lab by Owais</h1>
+                <p>Order Confirmation</p>
+            </div>
+            <div class="content">
+                <h2>Thank you for your order, {customer_name}!</h2>
+                <p>We've received your order and will contact you shortly to confirm the delivery details.</p>
+                <div class="order-details">
+                    <h3>Order Number: #{order_number}</h3>
+                    <p><strong>Payment Method:</strong> {payment_method}</p>
+                    {f'<p><strong>EasyPaisa Account:</strong> Muhammad Awais Raza - 03311339541</p>' if payment_method == 'EasyPaisa' else ''}
+                    <h4>Order Items:</h4>
+    """
+    for item in items:
+        price = float(item['price']) if isinstance(item['price'], str) else item['price']
+        quantity = int(item['quantity'])
+        subtotal = price * quantity
+        html_body += f"""
+                    <div class="item">
+                        <strong>{item['name']}</strong><br>
+                        Quantity: {quantity} × {legacy_format_price(price)} = {legacy_format_price(subtotal)}
+                    </div>
+        """
+    payment_instructions = """
+                <h3>What's Next?</h3>
+                <ul>
+                    <li><strong>No advance payment required - Pay when delivered</strong></li>
+                    <li>We'll confirm your order and start processing</li>
+                    <li>Your order will be carefully packaged</li>
+                    <li>Our delivery person will contact you before delivery</li>
+                    <li>Pay the exact amount when you receive your order</li>
+                    <li>Delivery within 3-5 business days</li>
+                </ul>
+    """
+    html_body += f"""
+                    <div class="total">
+                        Total Amount: {legacy_format_price(total_amount)}
+                    </div>
+                </div>
+                {payment_instructions}
+                <p>If you have any questions, feel free to contact us.</p>
+            </div>
+            <div class="footer">
+                <p>Sharp Lab by Owais - Premium Knives</p>
+                <p>This is an automated email. Please do not reply to this email.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    return html_body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    items = build_items(args.items)
+    total = sum(float(item['price']) * item['quantity'] for item in items)
+
+    cases = [
+        ('legacy f-string (html)', lambda: legacy_order_confirmation('Ali Khan', 'ORD12345678', items, total)),
+        ('template (html + text)', lambda: render_order_confirmation('Ali Khan', 'ORD12345678', items, total)),
+        ('template admin (html + text)', lambda: render_admin_notification(
+            'ORD12345678', 'Ali Khan', '03001234567', 'ali@example.com', items, total, 'House 1, Street 2', 'Lahore'
+        )),
+    ]
+
+    print(f'{args.items} items, best of 7 runs of {args.repeat} renders')
+    baseline = None
+    for label, render in cases:
+        seconds = min(timeit.repeat(render, number=args.repeat, repeat=7)) / args.repeat
+        baseline = baseline or seconds
+        print(f'{label:<30} {seconds * 1e6:8.1f} µs/render  x{baseline / seconds:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Compare Flask's default JSON provider with FastJSONProvider on a synthetic
+catalog payload shaped like /api/products and /api/admin/orders results.
+
+    python benchmarks/json_serialization.py [--products 2000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from psycopg2.extras import RealDictRow
+
+from utils.json_provider import FastJSONProvider, orjson
+
+
+def make_row(values):
+    row = RealDictRow()
+    row.update(values)
+    return row
+
+
+def build_catalog(count):
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    products = []
+    for i in range(count):
+        products.append(make_row({
+            'id': i,
+            'name': f'Damascus Chef Knife {i}',
+            'slug': f'damascus-chef-knife-{i}',
+            'description': 'Hand forged 67 layer Damascus steel blade with walnut handle. ' * 3,
+            'price': Decimal('149.99') + i,
+            'discounted_price': Decimal('119.99') + i,
+            'stock_quantity': i % 50,
+            'is_active': True,
+            'is_featured': i % 10 == 0,
+            'category_id': i % 8,
+            'category_name': 'Chef Knives',
+            'specifications': {
+                'blade_length': '8 inch',
+                'steel': 'VG-10',
+                'hardness': '60-61 HRC',
+                'layers': 67,
+                'weight_grams': 210
+            },
+            'images': [
+                make_row({
+                    'id': i * 3 + n,
+                    'image_url': f'/static/uploads/products/{i}/{n}.jpg',
+                    'is_main': n == 0,
+                    'display_order': n
+                })
+                for n in range(3)
+            ],
+            'created_at': created + timedelta(hours=i),
+            'updated_at': created + timedelta(hours=i, minutes=30)
+        }))
+    return {'products': products}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    payload = build_catalog(args.products)
+
+    fast = FastJSONProvider(app)
+    fallback = FastJSONProvider(app)
+    fallback.use_orjson = False
+
+    providers = [('flask default', DefaultJSONProvider(app)), ('fast (stdlib fallback)', fallback)]
+    if orjson is not None:
+        providers.append(('fast (orjson)', fast))
+    else:
+        print('orjson is not installed; only the stdlib fallback is measured')
+
+    with app.app_context():
+        expected = app.json.loads(DefaultJSONProvider(app).response(payload).get_data())
+        baseline = None
+        for label, provider in providers:
+            body = provider.response(payload).get_data()
+            assert provider.loads(body) == expected, f'{label} output differs from the default provider'
+
+            seconds = min(timeit.repeat(lambda: provider.response(payload).get_data(), number=1, repeat=args.repeat))
+            baseline = baseline or seconds
+            print(f'{label:<24} {seconds * 1000:8.2f} ms  {len(body) / 1024:8.1f} KiB  x{baseline / seconds:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,337 @@
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
+from contextlib import contextmanager
+from flask import g, has_request_context
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def get_db_connection():
-    database_url = os.getenv('DATABASE_URL')
-    if not database_url:
-        raise ValueError("DATABASE_URL environment variable not found")
-    
-    conn = psycopg2.connect(
-        database_url,
-        cursor_factory=RealDictCursor
-    )
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available within the checkout timeout"""
+    pass
+
+
+class PooledConnection:
+    """
+    Thin proxy around a psycopg2 connection borrowed from the pool.
+    Behaves like the raw connection, but close() hands it back to the pool
+    instead of tearing down the TCP/auth session.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    @property
+    def closed(self):
+        return 1 if self._raw is None else self._raw.closed
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.putconn(raw)
+
+    def __del__(self):
+        # Safety net: a connection dropped on an exception path still goes back to the pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool.
+
+    - keeps between min_size and max_size connections open
+    - blocks up to `timeout` seconds on checkout when every connection is busy
+    - pings connections that sat idle longer than `ping_after` seconds before handing them out
+    - retires connections older than `max_lifetime` seconds
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, timeout=10.0, max_lifetime=1800.0, ping_after=30.0):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+
+        self._idle = []  # list of (conn, created_at, returned_at)
+        self._created = {}  # id(conn) -> created_at for every open connection
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        for _ in range(min(min_size, self.max_size)):
+            with self._cond:
+                self._size += 1
+            conn = self._connect()
+            self._idle.append((conn, self._created[id(conn)], time.monotonic()))
+
+    def _connect(self):
+        """Open a new connection for a slot already reserved in self._size"""
+        try:
+            conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            if self._created.pop(id(conn), None) is not None:
+                self._size -= 1
+            self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, created_at, returned_at):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return False
+        if self.ping_after is not None and now - returned_at >= self.ping_after:
+            try:
+                cur = conn.cursor()
+                cur.execute('SELECT 1')
+                cur.close()
+                conn.rollback()
+            except Exception:
+                return False
+        return True
+
+    def getconn(self):
+        """Borrow a raw connection from the pool, opening a new one if allowed"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(pool max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    idle = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting so concurrent callers respect max_size
+                    idle = None
+                    self._size += 1
+
+            if idle is None:
+                return self._connect()
+
+            conn, created_at, returned_at = idle
+            if self._is_healthy(conn, created_at, returned_at):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn):
+        """Return a raw connection to the pool"""
+        if conn.closed or self._closed:
+            self._discard(conn)
+            return
+
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            created_at = self._created.get(id(conn))
+            if created_at is None:
+                return
+            if self.max_lifetime and time.monotonic() - created_at > self.max_lifetime:
+                expired = True
+            else:
+                expired = False
+                self._idle.append((conn, created_at, time.monotonic()))
+                self._cond.notify()
+
+        if expired:
+            self._discard(conn)
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it lazily (and again after a fork)"""
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            database_url = os.getenv('DATABASE_URL')
+            if not database_url:
+                raise ValueError("DATABASE_URL environment variable not found")
+
+            # Connections inherited from a parent process must not be reused
+            _pool = ConnectionPool(
+                database_url,
+                min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+                max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+                ping_after=float(os.getenv('DB_POOL_PING_AFTER', 30))
+            )
+            _pool_pid = pid
+    return _pool
+
+
+class RequestConnection:
+    """
+    Handle to the connection shared by every model call in one HTTP request.
+    close() only ends the current implicit transaction; the connection itself
+    goes back to the pool in release_request_connection() at teardown.
+    """
+
+    def __init__(self, pooled):
+        self._pooled = pooled
+
+    def __getattr__(self, name):
+        return getattr(self._pooled, name)
+
+    def close(self):
+        conn = self._pooled
+        if conn.closed:
+            return
+        status = conn.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_INERROR:
+            # A failed statement must not poison the next helper in this request
+            conn.rollback()
+        elif status != extensions.TRANSACTION_STATUS_IDLE and not g.get('_db_snapshot'):
+            # Finish the helper's read transaction so the connection isn't left idle in transaction
+            conn.rollback()
+
+
+def _get_request_connection():
+    conn = g.get('_db_conn')
+    if conn is None or conn.closed:
+        pool = get_pool()
+        conn = PooledConnection(pool, pool.getconn())
+        g._db_conn = conn
     return conn
+
+
+def release_request_connection(exc=None):
+    """Teardown hook: hand the request's shared connection back to the pool"""
+    conn = g.pop('_db_conn', None)
+    g.pop('_db_snapshot', None)
+    if conn is not None:
+        conn.close()
+
+
+def get_db_connection():
+    """
+    Borrow a pooled connection. Inside an HTTP request every caller shares
+    one connection; elsewhere each call gets its own. Either way close()
+    is the correct way to give it back.
+    """
+    if has_request_context():
+        return RequestConnection(_get_request_connection())
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+@contextmanager
+def db_connection():
+    """
+    Context manager around a pooled connection.
+    Rolls back on error and always returns the connection to the pool.
+
+        with db_connection() as conn:
+            cur = conn.cursor()
+            ...
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        conn.close()
+
+
+@contextmanager
+def read_snapshot():
+    """
+    Run every model read inside the block against one consistent
+    REPEATABLE READ, READ ONLY snapshot of the request's connection.
+    Outside a request this is a no-op.
+    """
+    if not has_request_context() or g.get('_db_snapshot'):
+        yield
+        return
+
+    conn = _get_request_connection()
+    if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+
+    cur = conn.cursor()
+    cur.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+    cur.close()
+    g._db_snapshot = True
+    try:
+        yield
+    finally:
+        g._db_snapshot = False
+        if not conn.closed:
+            conn.rollback()
@@ -91,6 +91,7 @@ def initialize_database():
                 link_url VARCHAR(500),
                 is_active BOOLEAN DEFAULT TRUE,
                 display_order INTEGER DEFAULT 0,
+                variants JSONB,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
@@ -105,6 +106,7 @@ def initialize_database():
                 is_main BOOLEAN DEFAULT FALSE,
                 display_order INTEGER DEFAULT 0,
                 alt_text VARCHAR(255),
+                variants JSONB,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
         """)
@@ -119,6 +121,42 @@ def initialize_database():
             );
         """)
         
+        # Create Newsletter Campaigns Table (last_subscriber_id is the resume checkpoint)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS newsletter_campaigns (
+                id SERIAL PRIMARY KEY,
+                subject VARCHAR(255) NOT NULL,
+                content_html TEXT NOT NULL,
+                content_text TEXT,
+                status VARCHAR(20) NOT NULL DEFAULT 'draft',
+                last_subscriber_id INTEGER NOT NULL DEFAULT 0,
+                total_recipients INTEGER NOT NULL DEFAULT 0,
+                sent_count INTEGER NOT NULL DEFAULT 0,
+                failed_count INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                locked_at TIMESTAMP,
+                locked_by VARCHAR(36),
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        
+        # Create Newsletter Deliveries Table (one row per campaign recipient)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS newsletter_deliveries (
+                id SERIAL PRIMARY KEY,
+                campaign_id INTEGER NOT NULL REFERENCES newsletter_campaigns(id) ON DELETE CASCADE,
+                subscriber_id INTEGER NOT NULL,
+                email VARCHAR(255) NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                error TEXT,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (campaign_id, subscriber_id)
+            );
+        """)
+        
         # Create Gallery Table
         cur.execute("""
             CREATE TABLE IF NOT EXISTS gallery (
@@ -128,6 +166,7 @@ def initialize_database():
                 alt_text VARCHAR(255),
                 is_active BOOLEAN DEFAULT TRUE,
                 display_order INTEGER DEFAULT 0,
+                variants JSONB,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
@@ -146,6 +185,61 @@ def initialize_database():
             );
         """)
         
+        # Create Image Jobs Table (variant generation queue)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS image_jobs (
+                id SERIAL PRIMARY KEY,
+                kind VARCHAR(50) NOT NULL,
+                target_id INTEGER NOT NULL,
+                image_name VARCHAR(255) NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 5,
+                run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                locked_at TIMESTAMP,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        
+        # Create Email Outbox Table (order emails, written in the order's transaction)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id SERIAL PRIMARY KEY,
+                order_id INTEGER REFERENCES orders(id) ON DELETE SET NULL,
+                kind VARCHAR(50) NOT NULL,
+                payload JSONB NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 5,
+                run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                locked_at TIMESTAMP,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        
+        # Create Image Sequences Table (next image number per product folder)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS image_sequences (
+                folder VARCHAR(255) PRIMARY KEY,
+                last_value INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        
+        # Add columns introduced after the first release to existing tables
+        migrations = [
+            "ALTER TABLE banners ADD COLUMN IF NOT EXISTS variants JSONB;",
+            "ALTER TABLE product_images ADD COLUMN IF NOT EXISTS variants JSONB;",
+            "ALTER TABLE gallery ADD COLUMN IF NOT EXISTS variants JSONB;",
+            "ALTER TABLE newsletter_campaigns ADD COLUMN IF NOT EXISTS locked_by VARCHAR(36);"
+        ]
+        
+        for migration_sql in migrations:
+            cur.execute(migration_sql)
+        
         # Create indexes for better performance
         indexes = [
             "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);",
@@ -154,16 +248,24 @@ def initialize_database():
             "CREATE INDEX IF NOT EXISTS idx_products_category_id ON products(category_id);",
             "CREATE INDEX IF NOT EXISTS idx_products_featured ON products(is_featured);",
             "CREATE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode);",
+            "CREATE INDEX IF NOT EXISTS idx_products_created_at_id ON products(created_at DESC, id DESC);",
+            "CREATE INDEX IF NOT EXISTS idx_products_category_created_at_id ON products(category_id, created_at DESC, id DESC);",
             "CREATE INDEX IF NOT EXISTS idx_banners_active ON banners(is_active);",
             "CREATE INDEX IF NOT EXISTS idx_banners_order ON banners(display_order);",
             "CREATE INDEX IF NOT EXISTS idx_product_images_product_id ON product_images(product_id);",
             "CREATE INDEX IF NOT EXISTS idx_product_images_main ON product_images(is_main);",
             "CREATE INDEX IF NOT EXISTS idx_product_images_order ON product_images(display_order);",
+            "CREATE INDEX IF NOT EXISTS idx_product_images_image_name ON product_images(image_name);",
+            "CREATE INDEX IF NOT EXISTS idx_banners_image_name ON banners(image_name);",
             "CREATE INDEX IF NOT EXISTS idx_newsletter_email ON newsletter_subscribers(email);",
             "CREATE INDEX IF NOT EXISTS idx_newsletter_active ON newsletter_subscribers(is_active);",
+            "CREATE INDEX IF NOT EXISTS idx_newsletter_active_id ON newsletter_subscribers(id) WHERE is_active = TRUE;",
             "CREATE INDEX IF NOT EXISTS idx_gallery_active ON gallery(is_active);",
             "CREATE INDEX IF NOT EXISTS idx_gallery_order ON gallery(display_order);",
             "CREATE INDEX IF NOT EXISTS idx_gallery_image_name ON gallery(image_name);",
+            "CREATE INDEX IF NOT EXISTS idx_image_jobs_due ON image_jobs(run_at, id) WHERE status IN ('pending', 'running');",
+            "CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(run_at, id) WHERE status IN ('pending', 'running');",
+            "CREATE INDEX IF NOT EXISTS idx_email_outbox_finished ON email_outbox(updated_at) WHERE status IN ('done', 'failed');",
             "CREATE INDEX IF NOT EXISTS idx_discounts_product_id ON discounts(product_id);",
             "CREATE INDEX IF NOT EXISTS idx_discounts_active ON discounts(is_active);",
             "CREATE INDEX IF NOT EXISTS idx_discounts_product_active ON discounts(product_id, is_active);"
@@ -175,6 +277,68 @@ def initialize_database():
         conn.commit()
         print("✓ Database tables created successfully!")
         print("✓ Database indexes created!")
+        
+        # Triggers go in their own transaction so a failure here never rolls back the tables
+        try:
+            # Notify app processes about catalog changes so they can evict cached data
+            cur.execute("""
+                CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+                DECLARE
+                    row_data JSONB;
+                    changed JSONB;
+                BEGIN
+                    IF TG_OP = 'DELETE' THEN
+                        row_data := to_jsonb(OLD);
+                    ELSE
+                        row_data := to_jsonb(NEW);
+                    END IF;
+                    IF TG_OP = 'UPDATE' THEN
+                        SELECT jsonb_agg(n.key) INTO changed
+                        FROM jsonb_each(row_data) n
+                        WHERE n.value IS DISTINCT FROM to_jsonb(OLD)->n.key;
+                        -- An update that changed nothing has nothing to evict
+                        IF changed IS NULL THEN
+                            RETURN NULL;
+                        END IF;
+                    END IF;
+                    PERFORM pg_notify('cache_invalidation', json_build_object(
+                        'table', TG_TABLE_NAME,
+                        'op', TG_OP,
+                        'id', row_data->'id',
+                        'product_id', row_data->'product_id',
+                        'is_active', row_data->'is_active',
+                        'was_active', CASE WHEN TG_OP = 'UPDATE' THEN to_jsonb(OLD)->'is_active' END,
+                        'changed', changed
+                    )::text);
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+            """)
+            
+            # Only create missing triggers: dropping and recreating them locks every table on each start
+            tables = ['products', 'discounts', 'product_images', 'banners', 'categories', 'gallery']
+            cur.execute("""
+                SELECT c.relname AS table_name
+                FROM pg_trigger t
+                JOIN pg_class c ON c.oid = t.tgrelid
+                WHERE t.tgname = c.relname || '_cache_invalidation' AND c.relname = ANY(%s)
+            """, (tables,))
+            existing = {row['table_name'] for row in cur.fetchall()}
+            
+            for table in tables:
+                if table not in existing:
+                    cur.execute(f"""
+                        CREATE TRIGGER {table}_cache_invalidation
+                        AFTER INSERT OR UPDATE OR DELETE ON {table}
+                        FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation();
+                    """)
+            
+            conn.commit()
+            print("✓ Cache invalidation triggers installed!")
+        except Exception as e:
+            conn.rollback()
+            print(f"✗ Could not install cache invalidation triggers: {e}")
+        
         print("✓ Database initialization completed - ready for use!")
         
         cur.close()
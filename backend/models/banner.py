@@ -1,4 +1,7 @@
 from config.database import get_db_connection
+from utils.cache import cached
+from utils.image_variants import build_srcset
+from utils.static_files import static_url
 
 class Banner:
     @staticmethod
@@ -12,6 +15,7 @@ class Banner:
         return banners
 
     @staticmethod
+    @cached('banners:active', tags=('banners',))
     def get_active():
         conn = get_db_connection()
         cur = conn.cursor()
@@ -19,6 +23,10 @@ class Banner:
         banners = cur.fetchall()
         cur.close()
         conn.close()
+        # Versioned URLs let browsers cache the images as immutable
+        for row in banners:
+            row['srcset'] = build_srcset(row['image_name'], row.pop('variants', None))
+            row['image_name'] = static_url(row['image_name'])
         return banners
 
     @staticmethod
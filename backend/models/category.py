@@ -1,7 +1,9 @@
 from config.database import get_db_connection
+from utils.cache import cached
 
 class Category:
     @staticmethod
+    @cached('categories:all', tags=('categories',))
     def get_all():
         conn = get_db_connection()
         cur = conn.cursor()
@@ -22,6 +24,7 @@ class Category:
         return category
 
     @staticmethod
+    @cached('categories:slug', tags=('categories',))
     def get_by_slug(slug):
         conn = get_db_connection()
         cur = conn.cursor()
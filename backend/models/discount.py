@@ -1,4 +1,5 @@
 from config.database import get_db_connection
+from utils.cache import invalidate_tags
 from datetime import datetime
 
 class Discount:
@@ -59,6 +60,7 @@ class Discount:
             conn.commit()
             cur.close()
             conn.close()
+            invalidate_tags('products', f'product:{product_id}')
             return discount_id
             
         except Exception as e:
@@ -83,6 +85,7 @@ class Discount:
             conn.commit()
             cur.close()
             conn.close()
+            invalidate_tags('products', f'product:{product_id}')
             return True
             
         except Exception as e:
@@ -107,6 +110,7 @@ class Discount:
             conn.commit()
             cur.close()
             conn.close()
+            invalidate_tags('products', f'product:{product_id}')
             return True
             
         except Exception as e:
@@ -130,6 +134,7 @@ class Discount:
             conn.commit()
             cur.close()
             conn.close()
+            invalidate_tags('products', f'product:{product_id}')
             return True
             
         except Exception as e:
@@ -0,0 +1,91 @@
+from psycopg2 import sql
+from utils.job_queue import JobQueue
+import json
+import os
+
+
+def _lock_timeout():
+    """
+    Seconds before a 'running' email is claimed again. One sender thread's
+    batch can take EMAIL_BATCH_SIZE sends, plus a reconnect, each up to
+    SMTP_TIMEOUT; the lock outlasts twice that, or a slow but working send
+    would be reclaimed and sent twice. EMAIL_LOCK_TIMEOUT can only raise it.
+    """
+    worst_batch = (int(os.getenv('EMAIL_BATCH_SIZE', 10)) + 2) * int(os.getenv('SMTP_TIMEOUT', 30))
+    return max(int(os.getenv('EMAIL_LOCK_TIMEOUT', 0)), 2 * worst_batch)
+
+
+queue = JobQueue(
+    'email_outbox',
+    backoff=int(os.getenv('EMAIL_RETRY_BACKOFF', 60)),
+    lock_timeout=_lock_timeout()
+)
+
+
+class EmailOutbox:
+    @staticmethod
+    def order_email_rows(order_number, customer_data, items, total_amount, payment_method):
+        """
+        (kind, payload, max_attempts) VALUES rows for an order's emails, as
+        psycopg2.sql literals ready to be composed into the statement that
+        creates the order
+        """
+        max_attempts = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+        emails = []
+
+        # Confirmation to the customer (if email provided)
+        if customer_data.get('email'):
+            emails.append(('order_confirmation', {
+                'customer_email': customer_data['email'],
+                'customer_name': customer_data['fullName'],
+                'order_number': order_number,
+                'items': items,
+                'total_amount': total_amount,
+                'payment_method': payment_method
+            }))
+
+        # Notification to the admin
+        emails.append(('admin_notification', {
+            'order_number': order_number,
+            'customer_name': customer_data['fullName'],
+            'customer_phone': customer_data['phone'],
+            'customer_email': customer_data.get('email') or 'Not provided',
+            'items': items,
+            'total_amount': total_amount,
+            'delivery_address': customer_data['address'],
+            'city': customer_data['city'],
+            'payment_method': payment_method
+        }))
+
+        return [
+            sql.SQL('({}, {}::jsonb, {}::integer)').format(
+                sql.Literal(kind), sql.Literal(json.dumps(payload)), sql.Literal(max_attempts)
+            )
+            for kind, payload in emails
+        ]
+
+    @staticmethod
+    def claim(limit=1):
+        return queue.claim(limit)
+
+    @staticmethod
+    def complete(email_id):
+        queue.complete(email_id)
+
+    @staticmethod
+    def fail(email, error):
+        return queue.fail(email, error)
+
+    @staticmethod
+    def retry(email_id):
+        return queue.retry(email_id)
+
+    @staticmethod
+    def prune(days):
+        """Delete sent and given-up emails older than `days` days; returns how many"""
+        return queue.prune(days)
+
+    @staticmethod
+    def stats():
+        """Email counts per status; 'pending' is the queue depth"""
+        return queue.stats()
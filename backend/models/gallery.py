@@ -1,4 +1,8 @@
 from config.database import get_db_connection
+from models.image_job import ImageJob
+from utils.cache import cached, invalidate_tags
+from utils.image_variants import build_srcset
+from utils.static_files import static_url
 
 class Gallery:
     @staticmethod
@@ -16,6 +20,7 @@ class Gallery:
         return images
 
     @staticmethod
+    @cached('gallery:active', tags=('gallery',))
     def get_active():
         """Get only active gallery images for frontend display"""
         conn = get_db_connection()
@@ -28,6 +33,10 @@ class Gallery:
         images = cur.fetchall()
         cur.close()
         conn.close()
+        # Versioned URLs let browsers cache the images as immutable
+        for row in images:
+            row['srcset'] = build_srcset(row['image_name'], row.pop('variants', None))
+            row['image_name'] = static_url(row['image_name'])
         return images
 
     @staticmethod
@@ -41,6 +50,17 @@ class Gallery:
         conn.close()
         return image
 
+    @staticmethod
+    def get_by_image_name(image_name):
+        """Get the gallery image stored under a file name, if any"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('SELECT * FROM gallery WHERE image_name = %s ORDER BY id LIMIT 1', (image_name,))
+        image = cur.fetchone()
+        cur.close()
+        conn.close()
+        return image
+
     @staticmethod
     def check_image_name_exists(image_name, exclude_id=None):
         """Check if image name already exists (for duplicate prevention)"""
@@ -59,59 +79,85 @@ class Gallery:
 
     @staticmethod
     def create(title, image_name, alt_text='', is_active=True, display_order=0):
-        """Create a new gallery image"""
+        """Create a new gallery image and queue its variant generation in one transaction; returns (gallery_id, job_id)"""
         conn = get_db_connection()
         cur = conn.cursor()
-        
-        cur.execute('''
-            INSERT INTO gallery (title, image_name, alt_text, is_active, display_order)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        ''', (title, image_name, alt_text, is_active, display_order))
-        
-        gallery_id = cur.fetchone()['id']
-        conn.commit()
-        cur.close()
-        conn.close()
-        return gallery_id
+        try:
+            cur.execute('''
+                INSERT INTO gallery (title, image_name, alt_text, is_active, display_order)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id
+            ''', (title, image_name, alt_text, is_active, display_order))
+            
+            gallery_id = cur.fetchone()['id']
+            job_id = ImageJob.enqueue('gallery', gallery_id, image_name, cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        invalidate_tags('gallery')
+        return gallery_id, job_id
 
     @staticmethod
     def update(gallery_id, title=None, image_name=None, alt_text=None, is_active=None, display_order=None):
-        """Update gallery image details"""
+        """
+        Update gallery image details. A new image_name drops the previous
+        image's variants and queues new ones in the same transaction.
+        """
         conn = get_db_connection()
         cur = conn.cursor()
-        
-        # Build update query dynamically
-        updates = []
-        params = []
-        
-        if title is not None:
-            updates.append('title = %s')
-            params.append(title)
-        if image_name is not None:
-            updates.append('image_name = %s')
-            params.append(image_name)
-        if alt_text is not None:
-            updates.append('alt_text = %s')
-            params.append(alt_text)
-        if is_active is not None:
-            updates.append('is_active = %s')
-            params.append(is_active)
-        if display_order is not None:
-            updates.append('display_order = %s')
-            params.append(display_order)
-        
-        if updates:
-            updates.append('updated_at = CURRENT_TIMESTAMP')
-            params.append(gallery_id)
-            cur.execute(f'''
-                UPDATE gallery SET {', '.join(updates)}
-                WHERE id = %s
-            ''', params)
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+        try:
+            # Build update query dynamically
+            updates = []
+            params = []
+            
+            if title is not None:
+                updates.append('title = %s')
+                params.append(title)
+            if image_name is not None:
+                # Variants of the previous image no longer apply once the image is replaced
+                updates.append('variants = CASE WHEN image_name = %s THEN variants ELSE NULL END')
+                params.append(image_name)
+                updates.append('image_name = %s')
+                params.append(image_name)
+            if alt_text is not None:
+                updates.append('alt_text = %s')
+                params.append(alt_text)
+            if is_active is not None:
+                updates.append('is_active = %s')
+                params.append(is_active)
+            if display_order is not None:
+                updates.append('display_order = %s')
+                params.append(display_order)
+            
+            if updates:
+                image_changed = False
+                if image_name is not None:
+                    cur.execute('SELECT image_name FROM gallery WHERE id = %s FOR UPDATE', (gallery_id,))
+                    current = cur.fetchone()
+                    image_changed = current is not None and current['image_name'] != image_name
+                
+                updates.append('updated_at = CURRENT_TIMESTAMP')
+                params.append(gallery_id)
+                cur.execute(f'''
+                    UPDATE gallery SET {', '.join(updates)}
+                    WHERE id = %s
+                ''', params)
+                
+                if image_changed:
+                    ImageJob.enqueue('gallery', gallery_id, image_name, cur)
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        invalidate_tags('gallery')
         return True
 
     @staticmethod
@@ -123,6 +169,7 @@ class Gallery:
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('gallery')
 
     @staticmethod
     def get_max_display_order():
@@ -0,0 +1,116 @@
+from config.database import get_db_connection
+from utils.cache import invalidate_tags
+from utils.job_queue import JobQueue
+import json
+import os
+
+# Row that receives the generated variants, and the cache tag it feeds, per job kind
+TARGETS = {
+    'product_image': ('product_images', 'products'),
+    'gallery': ('gallery', 'gallery'),
+    'banner': ('banners', 'banners'),
+}
+
+queue = JobQueue(
+    'image_jobs',
+    backoff=int(os.getenv('IMAGE_JOB_RETRY_BACKOFF', 30)),
+    lock_timeout=int(os.getenv('IMAGE_JOB_LOCK_TIMEOUT', 600))
+)
+
+
+class ImageJob:
+    @staticmethod
+    def enqueue(kind, target_id, image_name, cur=None):
+        """
+        Queue variant generation for an uploaded image; returns the job id.
+        Pass the cursor that inserted or updated the image row so the row and
+        its job are committed (or rolled back) together.
+        """
+        if kind not in TARGETS:
+            raise ValueError(f"Unknown image job kind: {kind}")
+
+        conn = get_db_connection() if cur is None else None
+        job_cur = cur or conn.cursor()
+        job_cur.execute('''
+            INSERT INTO image_jobs (kind, target_id, image_name, max_attempts)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id
+        ''', (kind, target_id, image_name, int(os.getenv('IMAGE_JOB_MAX_ATTEMPTS', 5))))
+        job_id = job_cur.fetchone()['id']
+        if conn is not None:
+            conn.commit()
+            job_cur.close()
+            conn.close()
+        return job_id
+
+    @staticmethod
+    def enqueue_many(kind, targets, cur=None):
+        """
+        Queue several (target_id, image_name) jobs in one statement; returns the job ids in order.
+        As with enqueue(), pass the caller's cursor to commit the jobs with the rows.
+        """
+        if kind not in TARGETS:
+            raise ValueError(f"Unknown image job kind: {kind}")
+        if not targets:
+            return []
+
+        max_attempts = int(os.getenv('IMAGE_JOB_MAX_ATTEMPTS', 5))
+        conn = get_db_connection() if cur is None else None
+        job_cur = cur or conn.cursor()
+        values = ','.join(
+            job_cur.mogrify('(%s, %s, %s, %s)', (kind, target_id, image_name, max_attempts)).decode()
+            for target_id, image_name in targets
+        )
+        job_cur.execute(f'''
+            INSERT INTO image_jobs (kind, target_id, image_name, max_attempts)
+            VALUES {values}
+            RETURNING id, target_id
+        ''')
+        ids_by_target = {row['target_id']: row['id'] for row in job_cur.fetchall()}
+        if conn is not None:
+            conn.commit()
+            job_cur.close()
+            conn.close()
+        return [ids_by_target[target_id] for target_id, _ in targets]
+
+    @staticmethod
+    def claim(limit=1):
+        return queue.claim(limit)
+
+    @staticmethod
+    def complete(job, variants):
+        """Store the variants on the target row and mark the job done in one transaction"""
+        table, tag = TARGETS[job['kind']]
+
+        tags = [tag]
+
+        def apply(cur):
+            # Skip rows whose image was replaced or deleted while the job ran
+            cur.execute(f'''
+                UPDATE {table} SET variants = %s
+                WHERE id = %s AND image_name = %s
+                RETURNING *
+            ''', (json.dumps(variants), job['target_id'], job['image_name']))
+            row = cur.fetchone()
+            # Product images also feed their product's detail response
+            if row and row.get('product_id') is not None:
+                tags.append(f"product:{row['product_id']}")
+
+        queue.complete(job['id'], apply)
+        invalidate_tags(*tags)
+
+    @staticmethod
+    def fail(job, error):
+        return queue.fail(job, error)
+
+    @staticmethod
+    def retry(job_id):
+        return queue.retry(job_id)
+
+    @staticmethod
+    def get_many(job_ids):
+        return queue.get_many(job_ids)
+
+    @staticmethod
+    def stats():
+        return queue.stats()
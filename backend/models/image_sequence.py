@@ -0,0 +1,44 @@
+from config.database import get_db_connection
+
+class ImageSequence:
+    @staticmethod
+    def reserve(folder, count=1, seed=None):
+        """
+        Atomically reserve `count` consecutive image numbers for a folder and
+        return them as a range. Concurrent uploads always get disjoint numbers.
+
+        seed: callable returning the highest number already used on disk; it is
+        only called the first time a folder is seen, to carry on after files
+        that predate the sequence.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute('''
+                UPDATE image_sequences SET last_value = last_value + %s
+                WHERE folder = %s
+                RETURNING last_value
+            ''', (count, folder))
+            row = cur.fetchone()
+
+            if row is None:
+                start = seed() if seed else 0
+                # Another upload may create the row first; then just take the next block
+                cur.execute('''
+                    INSERT INTO image_sequences (folder, last_value)
+                    VALUES (%s, %s)
+                    ON CONFLICT (folder) DO UPDATE SET last_value = image_sequences.last_value + %s
+                    RETURNING last_value
+                ''', (folder, start + count, count))
+                row = cur.fetchone()
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+        last_value = row['last_value']
+        return range(last_value - count + 1, last_value + 1)
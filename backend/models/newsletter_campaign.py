@@ -0,0 +1,257 @@
+from config.database import get_db_connection
+import uuid
+
+
+class NewsletterCampaign:
+    @staticmethod
+    def create(subject, content_html, content_text=None):
+        """Create a draft campaign"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            INSERT INTO newsletter_campaigns (subject, content_html, content_text)
+            VALUES (%s, %s, %s)
+            RETURNING *
+        ''', (subject, content_html, content_text))
+        campaign = cur.fetchone()
+        conn.commit()
+        cur.close()
+        conn.close()
+        return campaign
+
+    @staticmethod
+    def get_all():
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            SELECT id, subject, status, total_recipients, sent_count, failed_count,
+                   created_at, started_at, finished_at
+            FROM newsletter_campaigns
+            ORDER BY created_at DESC
+        ''')
+        campaigns = cur.fetchall()
+        cur.close()
+        conn.close()
+        return campaigns
+
+    @staticmethod
+    def get_by_id(campaign_id):
+        """Campaign with its progress and the latest failed deliveries"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('SELECT * FROM newsletter_campaigns WHERE id = %s', (campaign_id,))
+        campaign = cur.fetchone()
+
+        if campaign:
+            cur.execute('''
+                SELECT email, error, sent_at FROM newsletter_deliveries
+                WHERE campaign_id = %s AND status = 'failed'
+                ORDER BY id DESC
+                LIMIT 50
+            ''', (campaign_id,))
+            campaign['recent_failures'] = cur.fetchall()
+
+        cur.close()
+        conn.close()
+        return campaign
+
+    @staticmethod
+    def start(campaign_id):
+        """
+        Queue a draft or paused campaign for sending. Returns the campaign, or
+        None if it doesn't exist or is already running or finished.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            UPDATE newsletter_campaigns
+            SET status = 'running', last_error = NULL,
+                started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+                total_recipients = CASE WHEN status = 'draft'
+                    THEN (SELECT COUNT(*) FROM newsletter_subscribers WHERE is_active = TRUE)
+                    ELSE total_recipients END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status IN ('draft', 'paused')
+            RETURNING *
+        ''', (campaign_id,))
+        campaign = cur.fetchone()
+        conn.commit()
+        cur.close()
+        conn.close()
+        return campaign
+
+    @staticmethod
+    def pause(campaign_id, error=None):
+        """Stop a running campaign after its current batch; start() resumes it from the checkpoint"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            UPDATE newsletter_campaigns
+            SET status = 'paused', last_error = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = 'running'
+        ''', (error, campaign_id))
+        paused = cur.rowcount > 0
+        conn.commit()
+        cur.close()
+        conn.close()
+        return paused
+
+    @staticmethod
+    def claim(lock_timeout):
+        """
+        Lock one running campaign for this sender. A campaign whose sender
+        stopped sending progress for `lock_timeout` seconds is taken over.
+        Every claim gets a new `locked_by` token; the lock-holder methods below
+        only act while that token still holds the lock.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            UPDATE newsletter_campaigns
+            SET locked_at = CURRENT_TIMESTAMP, locked_by = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = (
+                SELECT id FROM newsletter_campaigns
+                WHERE status = 'running'
+                  AND (locked_at IS NULL OR locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+                ORDER BY started_at, id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        ''', (str(uuid.uuid4()), lock_timeout))
+        campaign = cur.fetchone()
+        conn.commit()
+        cur.close()
+        conn.close()
+        return campaign
+
+    @staticmethod
+    def next_subscribers(after_id, limit):
+        """
+        The next `limit` active subscribers after `after_id`, in id order.
+        A short keyset query per batch: nothing stays open while the batch is sent.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            SELECT id, email FROM newsletter_subscribers
+            WHERE is_active = TRUE AND id > %s
+            ORDER BY id
+            LIMIT %s
+        ''', (after_id, limit))
+        subscribers = cur.fetchall()
+        cur.close()
+        conn.close()
+        return subscribers
+
+    @staticmethod
+    def heartbeat(campaign_id, locked_by):
+        """
+        Renew the sender's lock while a batch is in flight; returns the
+        campaign's status, or None if another sender has taken it over
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            UPDATE newsletter_campaigns SET locked_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND locked_by = %s
+            RETURNING status
+        ''', (campaign_id, locked_by))
+        campaign = cur.fetchone()
+        conn.commit()
+        cur.close()
+        conn.close()
+        return campaign['status'] if campaign else None
+
+    @staticmethod
+    def record_batch(campaign_id, locked_by, deliveries):
+        """
+        Store (subscriber_id, email, error) results and move the checkpoint past
+        them in one transaction. Returns the campaign's status and checkpoint,
+        so the sender notices a pause and continues from the stored position,
+        or None (nothing stored) if another sender has taken the campaign over.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            # Held until commit: a takeover waits for this batch to be recorded
+            cur.execute('''
+                SELECT id FROM newsletter_campaigns
+                WHERE id = %s AND locked_by = %s
+                FOR UPDATE
+            ''', (campaign_id, locked_by))
+            if cur.fetchone() is None:
+                conn.rollback()
+                return None
+            
+            values = ','.join(
+                cur.mogrify('(%s, %s, %s, %s, %s)', (
+                    campaign_id, subscriber_id, email,
+                    'failed' if error else 'sent',
+                    str(error)[:1000] if error else None
+                )).decode()
+                for subscriber_id, email, error in deliveries
+            )
+            # A batch resent after a crash keeps its first recorded result
+            cur.execute(f'''
+                INSERT INTO newsletter_deliveries (campaign_id, subscriber_id, email, status, error)
+                VALUES {values}
+                ON CONFLICT (campaign_id, subscriber_id) DO NOTHING
+                RETURNING status
+            ''')
+            recorded = [row['status'] for row in cur.fetchall()]
+            cur.execute('''
+                UPDATE newsletter_campaigns
+                SET last_subscriber_id = GREATEST(last_subscriber_id, %s),
+                    sent_count = sent_count + %s, failed_count = failed_count + %s,
+                    locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND locked_by = %s
+                RETURNING status, last_subscriber_id
+            ''', (
+                max(subscriber_id for subscriber_id, _, _ in deliveries),
+                recorded.count('sent'), recorded.count('failed'), campaign_id, locked_by
+            ))
+            campaign = cur.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return campaign
+
+    @staticmethod
+    def finish(campaign_id, locked_by):
+        """Mark a campaign sent to every subscriber; False if the lock was lost"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            UPDATE newsletter_campaigns
+            SET status = 'done', locked_at = NULL, locked_by = NULL,
+                finished_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND locked_by = %s AND status = 'running'
+        ''', (campaign_id, locked_by))
+        finished = cur.rowcount > 0
+        conn.commit()
+        cur.close()
+        conn.close()
+        return finished
+
+    @staticmethod
+    def release(campaign_id, locked_by):
+        """
+        Give up the lock without changing the status (e.g. paused, or sender
+        stopping). A lock since taken over by another sender is left alone.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute('''
+            UPDATE newsletter_campaigns SET locked_at = NULL, locked_by = NULL
+            WHERE id = %s AND locked_by = %s
+        ''', (campaign_id, locked_by))
+        released = cur.rowcount > 0
+        conn.commit()
+        cur.close()
+        conn.close()
+        return released
@@ -1,8 +1,8 @@
 from config.database import get_db_connection
-from services.email_service import EmailService
+from models.email_outbox import EmailOutbox
+from psycopg2 import sql
 import random
 import string
-import threading
 
 class Order:
     @staticmethod
@@ -20,31 +20,11 @@ class Order:
             # Generate unique order number
             order_number = Order.generate_order_number()
             
-            # Insert order
-            cur.execute('''
-                INSERT INTO orders (
-                    order_number, customer_name, customer_phone, customer_email,
-                    delivery_address, city, order_notes, total_amount, payment_method
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id, order_number
-            ''', (
-                order_number,
-                customer_data['fullName'],
-                customer_data['phone'],
-                customer_data.get('email', ''),
-                customer_data['address'],
-                customer_data['city'],
-                customer_data.get('notes', ''),
-                total_amount,
-                payment_method
-            ))
+            if not items:
+                raise ValueError('An order needs at least one item')
             
-            order = cur.fetchone()
-            order_id = order['id']
-            order_number = order['order_number']
-            
-            # Insert order items
+            # Build the order item rows up front; values are composed as quoted literals
+            item_rows = []
             for item in items:
                 # Convert price to float if it's a string
                 price = float(item['price']) if isinstance(item['price'], str) else item['price']
@@ -55,14 +35,9 @@ class Order:
                 original_price = float(item.get('originalPrice', price))
                 discount_amount = float(item.get('discountAmount', 0))
                 
-                cur.execute('''
-                    INSERT INTO order_items (
-                        order_id, product_id, product_name, price, quantity, subtotal,
-                        original_price, discount_amount
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ''', (
-                    order_id,
+                item_rows.append(sql.SQL(
+                    '({}::integer, {}, {}::numeric, {}::integer, {}::numeric, {}::numeric, {}::numeric)'
+                ).format(*map(sql.Literal, (
                     item['productId'],
                     item['name'],
                     price,
@@ -70,47 +45,66 @@ class Order:
                     subtotal,
                     original_price,
                     discount_amount * quantity  # Total discount for this item
-                ))
+                ))))
             
-            conn.commit()
-            cur.close()
-            conn.close()
+            order_values = sql.SQL(', ').join(map(sql.Literal, (
+                order_number,
+                customer_data['fullName'],
+                customer_data['phone'],
+                customer_data.get('email', ''),
+                customer_data['address'],
+                customer_data['city'],
+                customer_data.get('notes', ''),
+                total_amount,
+                payment_method
+            )))
             
-            # Send emails in background thread (non-blocking)
-            def send_emails_async():
-                # Send confirmation email to customer (if email provided)
-                if customer_data.get('email'):
-                    try:
-                        EmailService.send_order_confirmation(
-                            customer_email=customer_data['email'],
-                            customer_name=customer_data['fullName'],
-                            order_number=order_number,
-                            items=items,
-                            total_amount=total_amount,
-                            payment_method=payment_method
-                        )
-                    except Exception as e:
-                        print(f"Failed to send customer email: {e}")
-                
-                # Send notification to admin
-                try:
-                    EmailService.send_admin_notification(
-                        order_number=order_number,
-                        customer_name=customer_data['fullName'],
-                        customer_phone=customer_data['phone'],
-                        customer_email=customer_data.get('email', 'Not provided'),
-                        items=items,
-                        total_amount=total_amount,
-                        delivery_address=customer_data['address'],
-                        city=customer_data['city'],
-                        payment_method=payment_method
+            # Emails are queued with the order and sent by the email worker after commit
+            email_rows = EmailOutbox.order_email_rows(order_number, customer_data, items, total_amount, payment_method)
+            
+            # Insert the order, all its items and its emails in one statement (one round trip for any cart size).
+            # Every value is a literal and no parameters are passed, so a '%' in a name needs no escaping.
+            cur.execute(sql.SQL('''
+                WITH new_order AS (
+                    INSERT INTO orders (
+                        order_number, customer_name, customer_phone, customer_email,
+                        delivery_address, city, order_notes, total_amount, payment_method
                     )
-                except Exception as e:
-                    print(f"Failed to send admin notification: {e}")
+                    VALUES ({order_values})
+                    RETURNING id, order_number
+                ),
+                new_items AS (
+                    INSERT INTO order_items (
+                        order_id, product_id, product_name, price, quantity, subtotal,
+                        original_price, discount_amount
+                    )
+                    SELECT new_order.id, item.*
+                    FROM new_order, (VALUES {item_rows}) AS item (
+                        product_id, product_name, price, quantity, subtotal,
+                        original_price, discount_amount
+                    )
+                    RETURNING 1
+                ),
+                new_emails AS (
+                    INSERT INTO email_outbox (order_id, kind, payload, max_attempts)
+                    SELECT new_order.id, email.*
+                    FROM new_order, (VALUES {email_rows}) AS email (kind, payload, max_attempts)
+                    RETURNING 1
+                )
+                SELECT id, order_number, (SELECT COUNT(*) FROM new_items) AS item_count
+                FROM new_order
+            ''').format(
+                order_values=order_values,
+                item_rows=sql.SQL(',').join(item_rows),
+                email_rows=sql.SQL(',').join(email_rows)
+            ))
             
-            # Start background thread for email sending
-            email_thread = threading.Thread(target=send_emails_async, daemon=True)
-            email_thread.start()
+            order = cur.fetchone()
+            order_number = order['order_number']
+            
+            conn.commit()
+            cur.close()
+            conn.close()
             
             return {'orderId': order_number, 'success': True}
             
@@ -1,8 +1,56 @@
 from config.database import get_db_connection
 from models.product_image import ProductImage
+from utils.cache import cache, cached, invalidate_tags
+from utils.image_variants import build_srcset
+from utils.static_files import static_url
 from datetime import datetime
+import base64
+import json
+import os
+
+# Listing totals are dropped on every product write; the TTL only covers writes made outside the app
+PRODUCT_COUNT_CACHE_TTL = int(os.getenv('PRODUCT_COUNT_CACHE_TTL', 300))
 
 class Product:
+    @staticmethod
+    def _apply_discount(product, discount):
+        """Set pricing fields on a product dict from its active discount row (or None)"""
+        if discount:
+            original_price = float(product['price'])
+            discount_percentage = float(discount['discount_percentage'])
+            discount_amount = original_price * (discount_percentage / 100)
+            final_price = round(original_price - discount_amount, 2)
+            
+            product['has_active_discount'] = True
+            product['original_price'] = original_price
+            product['final_price'] = final_price
+            product['discount_amount'] = round(discount_amount, 2)
+            product['savings'] = round(discount_amount, 2)
+            product['discount_percentage'] = discount_percentage
+        else:
+            product['has_active_discount'] = False
+            product['original_price'] = float(product['price'])
+            product['final_price'] = float(product['price'])
+            product['discount_amount'] = 0
+            product['savings'] = 0
+            product['discount_percentage'] = 0
+        return product
+
+    @staticmethod
+    def _apply_images(product, product_images):
+        """Set image fields on a product dict from its ordered product_images rows"""
+        if product_images:
+            # Use images from product_images table
+            main_image = next((img for img in product_images if img['is_main']), product_images[0] if product_images else None)
+            product['main_image'] = main_image['image_name'] if main_image else None
+            product['all_images'] = [img['image_name'] for img in product_images]
+            product['gallery_images'] = product_images
+        else:
+            product['main_image'] = None
+            product['all_images'] = []
+            product['gallery_images'] = []
+        return product
+
     @staticmethod
     def _add_discount_info_to_product(product):
         """Add discount information to a product dict"""
@@ -11,26 +59,7 @@ class Product:
             
             # Get active discount for this product
             discount = Discount.get_active_discount_for_product(product['id'])
-            
-            if discount:
-                original_price = float(product['price'])
-                discount_percentage = float(discount['discount_percentage'])
-                discount_amount = original_price * (discount_percentage / 100)
-                final_price = round(original_price - discount_amount, 2)
-                
-                product['has_active_discount'] = True
-                product['original_price'] = original_price
-                product['final_price'] = final_price
-                product['discount_amount'] = round(discount_amount, 2)
-                product['savings'] = round(discount_amount, 2)
-                product['discount_percentage'] = discount_percentage
-            else:
-                product['has_active_discount'] = False
-                product['original_price'] = float(product['price'])
-                product['final_price'] = float(product['price'])
-                product['discount_amount'] = 0
-                product['savings'] = 0
-                product['discount_percentage'] = 0
+            Product._apply_discount(product, discount)
         
         return product
 
@@ -43,182 +72,276 @@ class Product:
             
             # Get images from product_images table
             product_images = ProductImage.get_by_product_id(product['id'])
-            
-            if product_images:
-                # Use images from product_images table
-                main_image = next((img for img in product_images if img['is_main']), product_images[0] if product_images else None)
-                product['main_image'] = main_image['image_name'] if main_image else None
-                product['all_images'] = [img['image_name'] for img in product_images]
-                product['gallery_images'] = product_images
-            else:
-                product['main_image'] = None
-                product['all_images'] = []
-                product['gallery_images'] = []
+            Product._apply_images(product, product_images)
         return product
     
     @staticmethod
     def _add_main_image_to_products(products):
-        """Add only main image information to a list of product dicts for listings - OPTIMIZED"""
+        """Format listing rows from _lightweight_query (main image and discount already joined in SQL)"""
         if not products:
             return []
         
-        # Extract product IDs
-        product_ids = [p['id'] for p in products]
-        
-        # Batch fetch all discounts in ONE query
-        from models.discount import Discount
-        discounts_map = Discount.get_active_discounts_batch(product_ids)
-        
-        # Batch fetch all main images in ONE query
-        images_map = ProductImage.get_main_images_batch(product_ids)
-        
         products_with_images = []
         for p in products:
             product = dict(p)
-            product_id = product['id']
+            product.pop('total_count', None)
             
-            # Add discount info from batch-fetched data
-            discount = discounts_map.get(product_id)
-            if discount:
-                original_price = float(product['price'])
-                discount_percentage = float(discount['discount_percentage'])
-                discount_amount = original_price * (discount_percentage / 100)
-                final_price = round(original_price - discount_amount, 2)
-                
-                product['has_active_discount'] = True
-                product['original_price'] = original_price
-                product['final_price'] = final_price
-                product['discount_amount'] = round(discount_amount, 2)
-                product['savings'] = round(discount_amount, 2)
-                product['discount_percentage'] = discount_percentage
-            else:
-                product['has_active_discount'] = False
-                product['original_price'] = float(product['price'])
-                product['final_price'] = float(product['price'])
-                product['discount_amount'] = 0
-                product['savings'] = 0
-                product['discount_percentage'] = 0
+            # Add discount info from the joined discount row
+            discount_percentage = product.pop('active_discount_percentage', None)
+            discount = {'discount_percentage': discount_percentage} if discount_percentage is not None else None
+            Product._apply_discount(product, discount)
             
-            # Add main image from batch-fetched data
-            main_image = images_map.get(product_id)
-            if main_image:
-                product['main_image'] = main_image['image_name']
+            # Responsive card images: srcset per format from the generated variants
+            variants = product.pop('main_image_variants', None)
+            if product.get('main_image'):
+                product['main_image_srcset'] = build_srcset(product['main_image'], variants)
+                product['main_image'] = static_url(product['main_image'])
                 products_with_images.append(product)
         
         return products_with_images
     
     @staticmethod
     def _add_images_to_products(products):
-        """Add image information to a list of product dicts and filter out products without images"""
+        """Add image information to a list of product dicts and filter out products without images - OPTIMIZED"""
+        if not products:
+            return []
+        
+        product_ids = [p['id'] for p in products]
+        
+        # Two queries for the whole result set instead of two per product
+        from models.discount import Discount
+        discounts_map = Discount.get_active_discounts_batch(product_ids)
+        images_map = ProductImage.get_by_product_ids_batch(product_ids)
+        
         products_with_images = []
         for p in products:
-            product = Product._add_images_to_product(dict(p))
+            product = dict(p)
+            Product._apply_discount(product, discounts_map.get(product['id']))
+            Product._apply_images(product, images_map.get(product['id']))
             # Only include products that have at least one valid image
-            if product and product.get('main_image') and product.get('all_images') and len(product.get('all_images', [])) > 0:
+            if product.get('main_image') and product.get('all_images'):
                 products_with_images.append(product)
         return products_with_images
     
     @staticmethod
-    def get_featured_lightweight():
-        """Get only featured products with lightweight data ordered by featured_order"""
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute('''
-            SELECT p.id, p.name, p.price, p.is_featured, p.stock, p.featured_order
+    def _lightweight_query(columns, where='TRUE', order_by='p.created_at DESC, p.id DESC', with_total=False):
+        """
+        Build a listing query that returns priced, imaged rows in ONE statement:
+        the main image and latest active discount come from LATERAL joins and,
+        when requested, the unpaginated total from count(*) OVER ().
+        Products without images are dropped by the inner image join.
+        """
+        total_column = ', count(*) OVER () AS total_count' if with_total else ''
+        return f'''
+            SELECT {columns},
+                   mi.image_name AS main_image,
+                   mi.variants AS main_image_variants,
+                   ad.discount_percentage AS active_discount_percentage{total_column}
             FROM products p
-            WHERE p.is_featured = TRUE
-            ORDER BY p.featured_order ASC, p.created_at DESC
-        ''')
-        products = cur.fetchall()
-        cur.close()
-        conn.close()
-        return Product._add_main_image_to_products(products)
+            JOIN LATERAL (
+                SELECT pi.image_name, pi.variants
+                FROM product_images pi
+                WHERE pi.product_id = p.id
+                ORDER BY pi.is_main DESC, pi.display_order ASC, pi.created_at ASC
+                LIMIT 1
+            ) mi ON TRUE
+            LEFT JOIN LATERAL (
+                SELECT d.discount_percentage
+                FROM discounts d
+                WHERE d.product_id = p.id AND d.is_active = TRUE
+                ORDER BY d.created_at DESC
+                LIMIT 1
+            ) ad ON TRUE
+            WHERE {where}
+            ORDER BY {order_by}
+        '''
 
     @staticmethod
-    def get_all_lightweight(page=1, limit=10):
-        """Get all products with pagination and only essential data for listings"""
+    def _get_lightweight_page(where, params, page, limit, count_key):
+        """Run one paginated listing query and return (rows, total_count)"""
         offset = (page - 1) * limit
         
+        # The window count costs as much as the page itself, so skip it when the total is cached
+        has_total, cached_total, count_versions = cache.lookup(f'product_count:{count_key}', ('products',))
+        
         conn = get_db_connection()
         cur = conn.cursor()
         
-        # Get products that have images with pagination
-        cur.execute('''
-            SELECT p.id, p.name, p.price, p.is_featured, p.stock
-            FROM products p
-            WHERE EXISTS (SELECT 1 FROM product_images pi WHERE pi.product_id = p.id)
-            ORDER BY p.created_at DESC
-            LIMIT %s OFFSET %s
-        ''', (limit, offset))
+        query = Product._lightweight_query('p.id, p.name, p.price, p.is_featured, p.stock', where, with_total=not has_total)
+        cur.execute(query + ' LIMIT %s OFFSET %s', (*params, limit, offset))
         products = cur.fetchall()
         
-        # Get total count of products with images
-        cur.execute('''
+        cur.close()
+        conn.close()
+        
+        if has_total:
+            return products, cached_total
+        
+        if products:
+            total_count = products[0]['total_count']
+            Product._cache_count(count_key, total_count, count_versions)
+        elif offset == 0:
+            total_count = 0
+            Product._cache_count(count_key, total_count, count_versions)
+        else:
+            # Past the last page there is no row to carry the window count
+            total_count = Product._count_with_images(where, params, count_key)
+        
+        return products, total_count
+
+    @staticmethod
+    def _count_with_images(where, params, count_key):
+        """Count products matching `where` that have at least one image (cached per count_key)"""
+        has_total, total_count, count_versions = cache.lookup(f'product_count:{count_key}', ('products',))
+        if has_total:
+            return total_count
+        
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(f'''
             SELECT COUNT(p.id) as total
             FROM products p
-            WHERE EXISTS (SELECT 1 FROM product_images pi WHERE pi.product_id = p.id)
-        ''')
+            WHERE {where}
+            AND EXISTS (SELECT 1 FROM product_images pi WHERE pi.product_id = p.id)
+        ''', params)
         total_count = cur.fetchone()['total']
+        cur.close()
+        conn.close()
+        
+        Product._cache_count(count_key, total_count, count_versions)
+        return total_count
+
+    @staticmethod
+    def _cache_count(count_key, total_count, versions):
+        # No versions means the lookup failed: the count may predate an invalidation
+        if versions is None:
+            return
+        cache.set(f'product_count:{count_key}', total_count, PRODUCT_COUNT_CACHE_TTL, ('products',), versions)
+
+    @staticmethod
+    def encode_cursor(created_at, product_id):
+        """Opaque keyset cursor for the (created_at, id) position of a listing row"""
+        raw = json.dumps([created_at.isoformat() if created_at else None, product_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, product_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return datetime.fromisoformat(created_at), int(product_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _get_lightweight_after_cursor(where, params, cursor, limit, include_total, count_key):
+        """
+        Keyset pagination: fetch the rows after `cursor` by seeking on
+        (created_at, id) instead of scanning and discarding OFFSET rows.
+        The COUNT only runs when the caller asks for totals.
+        """
+        if cursor:
+            created_at, product_id = Product.decode_cursor(cursor)
+            page_where = f'({where}) AND (p.created_at, p.id) < (%s, %s)'
+            page_params = (*params, created_at, product_id)
+        else:
+            page_where = where
+            page_params = params
+        
+        conn = get_db_connection()
+        cur = conn.cursor()
+        
+        # One extra row tells us whether another page exists
+        query = Product._lightweight_query('p.id, p.name, p.price, p.is_featured, p.stock, p.created_at', page_where)
+        cur.execute(query + ' LIMIT %s', (*page_params, limit + 1))
+        rows = cur.fetchall()
         
         cur.close()
         conn.close()
         
-        products_with_images = Product._add_main_image_to_products(products)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = Product.encode_cursor(last['created_at'], last['id'])
+        
+        products = Product._add_main_image_to_products(rows)
+        for product in products:
+            product.pop('created_at', None)
+        
+        pagination = {
+            'limit': limit,
+            'cursor': cursor or None,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
+        if include_total:
+            pagination['total'] = Product._count_with_images(where, params, count_key)
         
         return {
-            'products': products_with_images,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total_count,
-                'has_more': (page * limit) < total_count,
-                'total_pages': (total_count + limit - 1) // limit
-            }
+            'products': products,
+            'pagination': pagination
         }
 
     @staticmethod
-    def get_by_category_lightweight(category_id, page=1, limit=10):
-        """Get products by category with pagination and lightweight data"""
-        offset = (page - 1) * limit
-        
+    def _pagination(page, limit, total_count):
+        return {
+            'page': page,
+            'limit': limit,
+            'total': total_count,
+            'has_more': (page * limit) < total_count,
+            'total_pages': (total_count + limit - 1) // limit
+        }
+
+    @staticmethod
+    @cached('products:featured_lightweight', tags=('featured', 'products'))
+    def get_featured_lightweight():
+        """Get only featured products with lightweight data ordered by featured_order"""
         conn = get_db_connection()
         cur = conn.cursor()
-        
-        # Get products that have images with pagination
-        # Join with product_images to ensure we only get products with images
-        cur.execute('''
-            SELECT p.id, p.name, p.price, p.is_featured, p.stock
-            FROM products p
-            WHERE p.category_id = %s 
-            AND EXISTS (SELECT 1 FROM product_images pi WHERE pi.product_id = p.id)
-            ORDER BY p.created_at DESC
-            LIMIT %s OFFSET %s
-        ''', (category_id, limit, offset))
+        cur.execute(Product._lightweight_query(
+            'p.id, p.name, p.price, p.is_featured, p.stock, p.featured_order',
+            where='p.is_featured = TRUE',
+            order_by='p.featured_order ASC, p.created_at DESC'
+        ))
         products = cur.fetchall()
-        
-        # Get total count of products with images
-        cur.execute('''
-            SELECT COUNT(p.id) as total
-            FROM products p
-            WHERE p.category_id = %s 
-            AND EXISTS (SELECT 1 FROM product_images pi WHERE pi.product_id = p.id)
-        ''', (category_id,))
-        total_count = cur.fetchone()['total']
-        
         cur.close()
         conn.close()
+        return Product._add_main_image_to_products(products)
+
+    @staticmethod
+    def get_all_lightweight(page=1, limit=10, cursor=None, include_total=False):
+        """
+        Get all products with pagination and only essential data for listings.
+        Pass cursor ('' for the first page) to switch to keyset pagination.
+        """
+        if cursor is not None:
+            return Product._get_lightweight_after_cursor('TRUE', (), cursor, limit, include_total, 'all')
+        
+        products, total_count = Product._get_lightweight_page('TRUE', (), page, limit, 'all')
+        
+        return {
+            'products': Product._add_main_image_to_products(products),
+            'pagination': Product._pagination(page, limit, total_count)
+        }
+
+    @staticmethod
+    def get_by_category_lightweight(category_id, page=1, limit=10, cursor=None, include_total=False):
+        """
+        Get products by category with pagination and lightweight data.
+        Pass cursor ('' for the first page) to switch to keyset pagination.
+        """
+        if cursor is not None:
+            return Product._get_lightweight_after_cursor('p.category_id = %s', (category_id,), cursor, limit, include_total, str(category_id))
         
-        products_with_images = Product._add_main_image_to_products(products)
+        products, total_count = Product._get_lightweight_page('p.category_id = %s', (category_id,), page, limit, str(category_id))
         
         return {
-            'products': products_with_images,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total_count,
-                'has_more': (page * limit) < total_count,
-                'total_pages': (total_count + limit - 1) // limit
-            }
+            'products': Product._add_main_image_to_products(products),
+            'pagination': Product._pagination(page, limit, total_count)
         }
 
     @staticmethod
@@ -320,6 +443,7 @@ class Product:
             conn.commit()
             cur.close()
             conn.close()
+            invalidate_tags('featured', f'product:{product_id}')
             return True
             
         except Exception as e:
@@ -369,6 +493,7 @@ class Product:
             conn.commit()
             cur.close()
             conn.close()
+            invalidate_tags('featured', f'product:{product_id}')
             return True
             
         except Exception as e:
@@ -1,4 +1,6 @@
 from config.database import get_db_connection
+from models.image_job import ImageJob
+from utils.cache import invalidate_tags
 
 class ProductImage:
     @staticmethod
@@ -28,6 +30,33 @@ class ProductImage:
         images_map = {img['product_id']: img for img in images}
         return images_map
 
+    @staticmethod
+    def get_by_product_ids_batch(product_ids):
+        """Batch fetch all images for multiple products in ONE query - OPTIMIZED"""
+        if not product_ids:
+            return {}
+        
+        conn = get_db_connection()
+        cur = conn.cursor()
+        
+        # Same ordering as get_by_product_id, grouped per product
+        placeholders = ','.join(['%s'] * len(product_ids))
+        cur.execute(f'''
+            SELECT * FROM product_images 
+            WHERE product_id IN ({placeholders})
+            ORDER BY product_id, is_main DESC, display_order ASC, created_at ASC
+        ''', product_ids)
+        
+        images = cur.fetchall()
+        cur.close()
+        conn.close()
+        
+        # Create a map of product_id -> [images]
+        images_map = {}
+        for img in images:
+            images_map.setdefault(img['product_id'], []).append(img)
+        return images_map
+
     @staticmethod
     def get_by_product_id(product_id):
         conn = get_db_connection()
@@ -58,27 +87,89 @@ class ProductImage:
 
     @staticmethod
     def create(product_id, image_name, is_main=False, display_order=0, alt_text=''):
+        """
+        Insert an image and queue its variant generation in one transaction.
+        Returns (image_id, job_id).
+        """
         conn = get_db_connection()
         cur = conn.cursor()
-        
-        # If this is set as main image, unset other main images for this product
-        if is_main:
+        try:
+            # If this is set as main image, unset other main images for this product
+            if is_main:
+                cur.execute('''
+                    UPDATE product_images SET is_main = false 
+                    WHERE product_id = %s AND is_main = true
+                ''', (product_id,))
+            
             cur.execute('''
-                UPDATE product_images SET is_main = false 
-                WHERE product_id = %s AND is_main = true
-            ''', (product_id,))
+                INSERT INTO product_images (product_id, image_name, is_main, display_order, alt_text)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id
+            ''', (product_id, image_name, is_main, display_order, alt_text))
+            
+            image_id = cur.fetchone()['id']
+            job_id = ImageJob.enqueue('product_image', image_id, image_name, cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
         
-        cur.execute('''
-            INSERT INTO product_images (product_id, image_name, is_main, display_order, alt_text)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        ''', (product_id, image_name, is_main, display_order, alt_text))
+        # A product's first image makes it show up in listings
+        invalidate_tags('products', f'product:{product_id}')
+        return image_id, job_id
+
+    @staticmethod
+    def create_many(product_id, images):
+        """
+        Insert several images of one product in ONE multi-row statement and queue
+        their variant jobs in the same transaction.
+        `images` is a list of dicts with image_name, is_main, display_order and alt_text.
+        Returns (image_id, job_id) pairs in the same order as `images`.
+        """
+        if not images:
+            return []
         
-        image_id = cur.fetchone()['id']
-        conn.commit()
-        cur.close()
-        conn.close()
-        return image_id
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            # Same rule as create(): a new main image replaces the current one
+            if any(img['is_main'] for img in images):
+                cur.execute('''
+                    UPDATE product_images SET is_main = false 
+                    WHERE product_id = %s AND is_main = true
+                ''', (product_id,))
+            
+            values = ','.join(
+                cur.mogrify('(%s, %s, %s, %s, %s)', (
+                    product_id, img['image_name'], img['is_main'], img['display_order'], img['alt_text']
+                )).decode()
+                for img in images
+            )
+            cur.execute(f'''
+                INSERT INTO product_images (product_id, image_name, is_main, display_order, alt_text)
+                VALUES {values}
+                RETURNING id, display_order
+            ''')
+            
+            # RETURNING order isn't guaranteed; display_order is unique within the batch
+            ids_by_order = {row['display_order']: row['id'] for row in cur.fetchall()}
+            image_ids = [ids_by_order[img['display_order']] for img in images]
+            job_ids = ImageJob.enqueue_many('product_image', [
+                (image_id, img['image_name']) for image_id, img in zip(image_ids, images)
+            ], cur)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        
+        invalidate_tags('products', f'product:{product_id}')
+        return list(zip(image_ids, job_ids))
 
     @staticmethod
     def update(image_id, image_name=None, is_main=None, display_order=None, alt_text=None):
@@ -128,16 +219,22 @@ class ProductImage:
         conn.commit()
         cur.close()
         conn.close()
+        
+        # Main image / order changes show up in cached listings
+        invalidate_tags('products', f"product:{current_image['product_id']}")
         return True
 
     @staticmethod
     def delete(image_id):
         conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute('DELETE FROM product_images WHERE id = %s', (image_id,))
+        cur.execute('DELETE FROM product_images WHERE id = %s RETURNING product_id', (image_id,))
+        deleted = cur.fetchone()
         conn.commit()
         cur.close()
         conn.close()
+        if deleted:
+            invalidate_tags('products', f"product:{deleted['product_id']}")
 
     @staticmethod
     def delete_by_product_id(product_id):
@@ -146,4 +243,5 @@ class ProductImage:
         cur.execute('DELETE FROM product_images WHERE product_id = %s', (product_id,))
         conn.commit()
         cur.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
+        invalidate_tags('products', f'product:{product_id}')
\ No newline at end of file
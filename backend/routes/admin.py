@@ -4,13 +4,22 @@ import os
 import hashlib
 import json
 from config.database import get_db_connection
-from utils.image_helper import save_uploaded_image, delete_image_file
+from utils.image_helper import save_uploaded_image, delete_image_file, reserve_product_image_numbers
+from models.image_job import ImageJob
+from services.image_worker import wake_image_worker
+from models.email_outbox import EmailOutbox
+from services.email_worker import wake_email_worker
 from models.product_image import ProductImage
+from utils.cache import cache, invalidate_tags
 from werkzeug.utils import secure_filename
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 
 admin_bp = Blueprint('admin', __name__)
 
+# Files written concurrently per bulk image upload
+BULK_UPLOAD_WORKERS = int(os.getenv('BULK_UPLOAD_WORKERS', 4))
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -158,6 +167,7 @@ def create_product():
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('products')
         
         print(f"Product created successfully with ID: {product_id}")
         return jsonify({'success': True, 'id': product_id})
@@ -211,6 +221,7 @@ def update_product(product_id):
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('products', f'product:{product_id}')
         
         print(f"Product {product_id} updated successfully")
         return jsonify({'success': True})
@@ -244,17 +255,18 @@ def delete_product(product_id):
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('products', f'product:{product_id}')
+        
+        # Delete individual image files (shared content-addressed files are kept while still referenced)
+        for img in images:
+            delete_image_file(img['image_name'])
         
-        # Delete image files and folder
+        # Delete the product folder
         if product and product['barcode'] and product['category_name']:
             from pathlib import Path
             from werkzeug.utils import secure_filename
             import shutil
             
-            # Delete individual image files
-            for img in images:
-                delete_image_file(img['image_name'])
-            
             # Delete the entire product folder
             static_path = Path(__file__).parent.parent / 'static'
             product_folder = static_path / 'product_images' / secure_filename(product['category_name']) / secure_filename(product['barcode'])
@@ -302,6 +314,7 @@ def create_category():
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('categories')
         
         return jsonify({'success': True, 'id': category_id})
     except Exception as e:
@@ -330,6 +343,7 @@ def update_category(category_id):
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('categories')
         
         return jsonify({'success': True})
     except Exception as e:
@@ -346,6 +360,9 @@ def delete_category(category_id):
         cur.close()
         conn.close()
         
+        # Products in the deleted category move to no category
+        invalidate_tags('categories', 'products')
+        
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -496,11 +513,15 @@ def create_banner():
         ))
         
         banner_id = cur.fetchone()['id']
+        # Queued in the same transaction: a banner never exists without its variants job
+        job_id = ImageJob.enqueue('banner', banner_id, data['image_name'], cur)
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('banners')
+        wake_image_worker()
         
-        return jsonify({'success': True, 'id': banner_id})
+        return jsonify({'success': True, 'id': banner_id, 'job_id': job_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -513,10 +534,17 @@ def update_banner(banner_id):
         conn = get_db_connection()
         cur = conn.cursor()
         
+        cur.execute('SELECT image_name FROM banners WHERE id = %s', (banner_id,))
+        current = cur.fetchone()
+        image_changed = current is not None and current['image_name'] != data['image_name']
+        
+        # Variants of the previous image no longer apply once the image is replaced
         cur.execute('''
             UPDATE banners 
             SET title = %s, subtitle = %s, image_name = %s, link_url = %s, 
-                is_active = %s, display_order = %s, updated_at = CURRENT_TIMESTAMP
+                is_active = %s, display_order = %s,
+                variants = CASE WHEN image_name = %s THEN variants ELSE NULL END,
+                updated_at = CURRENT_TIMESTAMP
             WHERE id = %s
         ''', (
             data['title'],
@@ -525,14 +553,23 @@ def update_banner(banner_id):
             data.get('link_url', ''),
             data.get('is_active', True),
             data.get('display_order', 0),
+            data['image_name'],
             banner_id
         ))
         
+        job_id = None
+        if image_changed:
+            job_id = ImageJob.enqueue('banner', banner_id, data['image_name'], cur)
+        
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('banners')
         
-        return jsonify({'success': True})
+        if job_id is not None:
+            wake_image_worker()
+        
+        return jsonify({'success': True, 'job_id': job_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -547,13 +584,15 @@ def delete_banner(banner_id):
         cur.execute('SELECT image_name FROM banners WHERE id = %s', (banner_id,))
         banner = cur.fetchone()
         
-        if banner and banner['image_name']:
-            delete_image_file(banner['image_name'])
-        
         cur.execute('DELETE FROM banners WHERE id = %s', (banner_id,))
         conn.commit()
         cur.close()
         conn.close()
+        invalidate_tags('banners')
+        
+        # Remove the file once no record references it
+        if banner and banner['image_name']:
+            delete_image_file(banner['image_name'])
         
         return jsonify({'success': True})
     except Exception as e:
@@ -592,9 +631,11 @@ def add_product_image(product_id):
         alt_text = request.form.get('alt_text', '')
         
         # Create product image record
-        image_id = ProductImage.create(product_id, saved_filename, is_main, display_order, alt_text)
+        # Resized / WebP variants are generated by the image worker
+        image_id, job_id = ProductImage.create(product_id, saved_filename, is_main, display_order, alt_text)
+        wake_image_worker()
         
-        return jsonify({'success': True, 'id': image_id, 'filename': saved_filename})
+        return jsonify({'success': True, 'id': image_id, 'filename': saved_filename, 'job_id': job_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -630,8 +671,8 @@ def delete_product_image(image_id):
         image = cur.fetchone()
         
         if image:
-            delete_image_file(image['image_name'])
             ProductImage.delete(image_id)
+            delete_image_file(image['image_name'])
             
         cur.close()
         conn.close()
@@ -755,9 +796,11 @@ def upload_product_image(product_id):
         alt_text = request.form.get('alt_text', '')
         
         # Create product image record
-        image_id = ProductImage.create(product_id, saved_filename, is_main, display_order, alt_text)
+        # Resized / WebP variants are generated by the image worker
+        image_id, job_id = ProductImage.create(product_id, saved_filename, is_main, display_order, alt_text)
+        wake_image_worker()
         
-        return jsonify({'success': True, 'id': image_id, 'filename': saved_filename})
+        return jsonify({'success': True, 'id': image_id, 'filename': saved_filename, 'job_id': job_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -790,36 +833,74 @@ def upload_product_images_bulk(product_id):
         start_display_order = int(request.form.get('display_order', 0))
         set_first_as_main = request.form.get('is_main', 'false').lower() == 'true'
         
-        uploaded_images = []
+        # Skip empty file inputs; positions keep the original index for main / order / alt text
+        uploads = [(i, file) for i, file in enumerate(files) if file.filename != '']
+        if not uploads:
+            return jsonify({'error': 'No image files provided'}), 400
+        
+        # Reserve one block of image numbers for the whole upload instead of one per file
+        image_numbers = [None] * len(uploads)
+        if product['category_name'] and product['barcode']:
+            image_numbers = reserve_product_image_numbers(product['category_name'], product['barcode'], len(uploads))
         
-        # Upload each file
-        for i, file in enumerate(files):
-            if file.filename == '':
-                continue
-                
+        def save_file(position):
+            i, file = uploads[position]
             # Save the image with organized structure
-            saved_filename = save_uploaded_image(
+            return save_uploaded_image(
                 file, 
                 file.filename, 
                 product['category_name'], 
                 product['name'], 
                 product['barcode'],
-                'product'
+                'product',
+                image_number=image_numbers[position]
             )
-            
-            # Create product image record
-            is_main = set_first_as_main and i == 0  # Only first image can be main
-            display_order = start_display_order + i
-            alt_text = f"{product['name']} - Image {i + 1}"  # Auto-generate alt text
-            
-            image_id = ProductImage.create(product_id, saved_filename, is_main, display_order, alt_text)
-            
-            uploaded_images.append({
-                'id': image_id,
-                'filename': saved_filename,
-                'is_main': is_main,
-                'display_order': display_order
-            })
+        
+        # Write the files concurrently (disk I/O releases the GIL)
+        with ThreadPoolExecutor(max_workers=min(BULK_UPLOAD_WORKERS, len(uploads))) as pool:
+            futures = [pool.submit(save_file, position) for position in range(len(uploads))]
+        
+        saved_filenames = []
+        errors = []
+        for future in futures:
+            error = future.exception()
+            saved_filenames.append(None if error else future.result())
+            if error:
+                errors.append(error)
+        
+        if errors:
+            # All or nothing: drop the files that did get written
+            for saved_filename in saved_filenames:
+                if saved_filename:
+                    delete_image_file(saved_filename)
+            raise errors[0]
+        
+        # Create all product image records in one statement
+        images = [{
+            'image_name': saved_filename,
+            'is_main': set_first_as_main and i == 0,  # Only first image can be main
+            'display_order': start_display_order + i,
+            'alt_text': f"{product['name']} - Image {i + 1}"  # Auto-generate alt text
+        } for (i, _), saved_filename in zip(uploads, saved_filenames)]
+        
+        # Rows and their variant jobs are committed together; if that fails no file is left behind
+        try:
+            created = ProductImage.create_many(product_id, images)
+        except Exception:
+            for image in images:
+                delete_image_file(image['image_name'])
+            raise
+        
+        uploaded_images = [{
+            'id': image_id,
+            'filename': image['image_name'],
+            'is_main': image['is_main'],
+            'display_order': image['display_order'],
+            'job_id': job_id
+        } for (image_id, job_id), image in zip(created, images)]
+        
+        # Variants are generated in the background; poll /image-jobs?ids=... for progress
+        wake_image_worker()
         
         return jsonify({
             'success': True, 
@@ -829,6 +910,81 @@ def upload_product_images_bulk(product_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+# Image Processing Jobs
+@admin_bp.route('/image-jobs', methods=['GET'])
+@admin_required
+def get_image_jobs():
+    """Poll the status of image jobs: /image-jobs?ids=1,2,3"""
+    try:
+        job_ids = [int(job_id) for job_id in request.args.get('ids', '').split(',') if job_id.strip()]
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma separated list of job ids'}), 400
+    
+    try:
+        jobs = ImageJob.get_many(job_ids)
+        return jsonify([{
+            'id': job['id'],
+            'kind': job['kind'],
+            'target_id': job['target_id'],
+            'status': job['status'],
+            'attempts': job['attempts'],
+            'last_error': job['last_error']
+        } for job in jobs])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/image-jobs/stats', methods=['GET'])
+@admin_required
+def get_image_job_stats():
+    try:
+        return jsonify(ImageJob.stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/image-jobs/<int:job_id>/retry', methods=['POST'])
+@admin_required
+def retry_image_job(job_id):
+    try:
+        if not ImageJob.retry(job_id):
+            return jsonify({'error': 'Only failed jobs can be retried'}), 400
+        wake_image_worker()
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# Email Outbox
+@admin_bp.route('/email-outbox/stats', methods=['GET'])
+@admin_required
+def get_email_outbox_stats():
+    """Queue depth ('pending') and age of the oldest unsent email"""
+    try:
+        return jsonify(EmailOutbox.stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/email-outbox/<int:email_id>/retry', methods=['POST'])
+@admin_required
+def retry_outbox_email(email_id):
+    try:
+        if not EmailOutbox.retry(email_id):
+            return jsonify({'error': 'Only failed emails can be retried'}), 400
+        wake_email_worker()
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# Cache Monitoring
+@admin_bp.route('/cache/stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    return jsonify(cache.stats())
+
+@admin_bp.route('/cache/clear', methods=['POST'])
+@admin_required
+def clear_cache():
+    cache.clear()
+    return jsonify({'success': True})
+
 # Newsletter Management
 @admin_bp.route('/newsletter/subscribers', methods=['GET'])
 @admin_required
@@ -875,5 +1031,82 @@ def get_newsletter_stats():
         from models.newsletter import Newsletter
         total_subscribers = Newsletter.get_subscriber_count()
         return jsonify({'total_subscribers': total_subscribers})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# Newsletter Campaigns
+@admin_bp.route('/newsletter/campaigns', methods=['GET'])
+@admin_required
+def get_newsletter_campaigns():
+    try:
+        from models.newsletter_campaign import NewsletterCampaign
+        return jsonify(NewsletterCampaign.get_all())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/newsletter/campaigns', methods=['POST'])
+@admin_required
+def create_newsletter_campaign():
+    """Create a draft campaign: {subject, content_html, content_text (optional)}"""
+    try:
+        from models.newsletter_campaign import NewsletterCampaign
+        data = request.get_json() or {}
+        subject = (data.get('subject') or '').strip()
+        content_html = (data.get('content_html') or '').strip()
+        
+        if not subject or not content_html:
+            return jsonify({'error': 'subject and content_html are required'}), 400
+        
+        campaign = NewsletterCampaign.create(subject, content_html, data.get('content_text') or None)
+        return jsonify(campaign), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/newsletter/campaigns/<int:campaign_id>', methods=['GET'])
+@admin_required
+def get_newsletter_campaign(campaign_id):
+    """Campaign status and progress (sent / failed / total, latest failures)"""
+    try:
+        from models.newsletter_campaign import NewsletterCampaign
+        campaign = NewsletterCampaign.get_by_id(campaign_id)
+        if not campaign:
+            return jsonify({'error': 'Campaign not found'}), 404
+        return jsonify(campaign)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/newsletter/campaigns/<int:campaign_id>/start', methods=['POST'])
+@admin_required
+def start_newsletter_campaign(campaign_id):
+    """Start a draft campaign, or resume a paused one from its checkpoint"""
+    try:
+        from models.newsletter_campaign import NewsletterCampaign
+        from services.email_service import EmailService
+        from services.newsletter_sender import wake_newsletter_sender
+        
+        if not EmailService.is_configured():
+            return jsonify({'error': 'Email credentials not configured'}), 400
+        
+        # Every newsletter carries a per-subscriber unsubscribe link
+        if not os.getenv('NEWSLETTER_UNSUBSCRIBE_URL'):
+            return jsonify({'error': 'NEWSLETTER_UNSUBSCRIBE_URL is not configured'}), 400
+        
+        campaign = NewsletterCampaign.start(campaign_id)
+        if not campaign:
+            return jsonify({'error': 'Only draft or paused campaigns can be started'}), 400
+        
+        wake_newsletter_sender()
+        return jsonify({'success': True, 'status': campaign['status'], 'total_recipients': campaign['total_recipients']})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/newsletter/campaigns/<int:campaign_id>/pause', methods=['POST'])
+@admin_required
+def pause_newsletter_campaign(campaign_id):
+    try:
+        from models.newsletter_campaign import NewsletterCampaign
+        if not NewsletterCampaign.pause(campaign_id):
+            return jsonify({'error': 'Only running campaigns can be paused'}), 400
+        return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 400
\ No newline at end of file
@@ -1,18 +1,21 @@
 from flask import Blueprint, jsonify
 from models.banner import Banner
+from utils.http_cache import cached_response, conditional_json
 
 banners_bp = Blueprint('banners', __name__)
 
 @banners_bp.route('/', methods=['GET'])
+@cached_response('banners:active', tags=('banners',))
 def get_banners():
     """Get all active banners for public display"""
     try:
         banners = Banner.get_active()
-        return jsonify(banners)
+        return conditional_json(banners)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @banners_bp.route('/<int:banner_id>', methods=['GET'])
+@cached_response('banners:detail', tags=('banners',))
 def get_banner(banner_id):
     """Get a specific banner by ID"""
     try:
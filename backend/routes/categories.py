@@ -1,15 +1,18 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 from models.category import Category
 from models.product import Product
+from utils.http_cache import cached_response, conditional_json, listing_args
 
 categories_bp = Blueprint('categories', __name__)
 
 @categories_bp.route('/', methods=['GET'])
+@cached_response('categories:all', tags=('categories',))
 def get_categories():
     categories = Category.get_all()
     return jsonify(categories)
 
 @categories_bp.route('/<int:category_id>', methods=['GET'])
+@cached_response('categories:detail', tags=('categories',))
 def get_category(category_id):
     category = Category.get_by_id(category_id)
     if category:
@@ -17,6 +20,7 @@ def get_category(category_id):
     return jsonify({'error': 'Category not found'}), 404
 
 @categories_bp.route('/<slug>/products', methods=['GET'])
+@cached_response('categories:products', tags=('categories', 'products'))
 def get_category_products(slug):
     category = Category.get_by_slug(slug)
     if not category:
@@ -29,18 +33,27 @@ def get_category_products(slug):
     })
 
 @categories_bp.route('/<slug>/products/lightweight', methods=['GET'])
+@cached_response('categories:products_lightweight', tags=('categories', 'products'), key_args=listing_args)
 def get_category_products_lightweight(slug):
     """Get category products with only essential data for faster loading"""
     category = Category.get_by_slug(slug)
     if not category:
         return jsonify({'error': 'Category not found'}), 404
     
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 10))  # Default fallback, but frontend controls this
+    args = listing_args()
+    page = args['page']
+    limit = args['limit']  # Default fallback, but frontend controls this
     
-    result = Product.get_by_category_lightweight(category['id'], page, limit)
+    # Keyset pagination: ?cursor= (empty for the first page) then ?cursor=<next_cursor>
+    cursor = args['cursor']
+    include_total = args['include_total']
     
-    return jsonify({
+    try:
+        result = Product.get_by_category_lightweight(category['id'], page, limit, cursor, include_total)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return conditional_json({
         'category': category,
         'products': result['products'],
         'pagination': result['pagination']
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from models.gallery import Gallery
-from utils.image_helper import save_uploaded_image, delete_image_file
+from utils.image_helper import IMAGE_STORAGE_MODE, save_uploaded_image, delete_image_file
+from services.image_worker import wake_image_worker
 from routes.admin import admin_required
+from utils.http_cache import cached_response, conditional_json
 from werkzeug.utils import secure_filename
 from pathlib import Path
 import os
@@ -10,11 +12,12 @@ gallery_bp = Blueprint('gallery', __name__)
 
 # Public endpoint - Get active gallery images for frontend
 @gallery_bp.route('/', methods=['GET'])
+@cached_response('gallery:active', tags=('gallery',))
 def get_active_gallery():
     """Get all active gallery images for public display"""
     try:
         images = Gallery.get_active()
-        return jsonify(images)
+        return conditional_json(images)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -50,32 +53,60 @@ def create_gallery_image():
         if not title:
             return jsonify({'error': 'Title is required'}), 400
         
-        # Check for duplicate image names
         original_filename = secure_filename(file.filename)
         base_name = os.path.splitext(original_filename)[0]
         extension = os.path.splitext(original_filename)[1]
         
-        # Create unique filename for gallery
-        counter = 1
-        test_filename = f"gallery_{base_name}{extension}"
-        
-        while Gallery.check_image_name_exists(test_filename):
-            test_filename = f"gallery_{base_name}_{counter}{extension}"
-            counter += 1
-        
-        # Save image to gallery folder
-        saved_filename = save_uploaded_image(file, test_filename, image_type='gallery')
+        if IMAGE_STORAGE_MODE == 'content':
+            # The file is named after its content; the upload's name only supplies the extension
+            saved_filename = save_uploaded_image(file, original_filename, image_type='gallery')
+            
+            # The same photo always maps to the same file: reuse its row
+            existing_image = Gallery.get_by_image_name(saved_filename)
+            if existing_image:
+                return jsonify({
+                    'success': True,
+                    'id': existing_image['id'],
+                    'filename': saved_filename,
+                    'job_id': None,
+                    'duplicate': True,
+                    'message': 'This image is already in the gallery'
+                })
+        else:
+            # Pick the first name no gallery row uses (rows store the gallery/ path). The file is
+            # created exclusively, so a file already on disk, or one written by a concurrent
+            # upload that picked the same name, is never overwritten: try the next name instead.
+            saved_filename = None
+            counter = 0
+            while saved_filename is None:
+                suffix = f"_{counter}" if counter else ''
+                test_filename = f"gallery_{base_name}{suffix}{extension}"
+                counter += 1
+                if Gallery.check_image_name_exists(f"gallery/{test_filename}"):
+                    continue
+                try:
+                    saved_filename = save_uploaded_image(file, test_filename, image_type='gallery')
+                except FileExistsError:
+                    continue
         
         if not saved_filename:
             return jsonify({'error': 'Failed to save image'}), 400
         
         # Create gallery record
-        gallery_id = Gallery.create(title, saved_filename, alt_text, is_active, display_order)
+        # Resized / WebP variants for the responsive grid are generated by the image worker
+        try:
+            gallery_id, job_id = Gallery.create(title, saved_filename, alt_text, is_active, display_order)
+        except Exception:
+            # Don't leave an orphaned file behind (shared content files are kept while referenced)
+            delete_image_file(saved_filename)
+            raise
+        wake_image_worker()
         
         return jsonify({
             'success': True, 
             'id': gallery_id, 
             'filename': saved_filename,
+            'job_id': job_id,
             'message': 'Gallery image uploaded successfully'
         })
         
@@ -115,6 +146,9 @@ def update_gallery_image(gallery_id):
         )
         
         if success:
+            # A replaced image got a variant job in the same transaction
+            if new_image_name and new_image_name != existing_image['image_name']:
+                wake_image_worker()
             return jsonify({'success': True, 'message': 'Gallery image updated successfully'})
         else:
             return jsonify({'error': 'Failed to update gallery image'}), 400
@@ -132,13 +166,13 @@ def delete_gallery_image(gallery_id):
         if not image:
             return jsonify({'error': 'Gallery image not found'}), 404
         
-        # Delete the physical file
-        if image['image_name']:
-            delete_image_file(image['image_name'])
-        
         # Delete from database
         Gallery.delete(gallery_id)
         
+        # Delete the physical file once no record references it
+        if image['image_name']:
+            delete_image_file(image['image_name'])
+        
         return jsonify({'success': True, 'message': 'Gallery image deleted successfully'})
         
     except Exception as e:
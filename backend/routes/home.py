@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+from config.database import read_snapshot
+from models.banner import Banner
+from models.category import Category
+from models.product import Product
+from utils.cache import cached
+from utils.http_cache import conditional_response, make_etag
+
+home_bp = Blueprint('home', __name__)
+
+@cached('home:payload', tags=('banners', 'featured', 'products', 'categories'))
+def build_home_payload():
+    """Serialize the home page data once and cache the bytes together with their ETag"""
+    # All three reads share the request's connection and one consistent snapshot
+    with read_snapshot():
+        payload = {
+            'banners': Banner.get_active(),
+            'featured_products': Product.get_featured_lightweight(),
+            'categories': Category.get_all()
+        }
+
+    body = jsonify(payload).get_data()
+    return body, make_etag(body)
+
+@home_bp.route('/', methods=['GET'])
+def get_home():
+    """Get banners, featured products and categories for the home page in one response"""
+    try:
+        body, etag = build_home_payload()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    # 304 Not Modified when the client already has this exact payload
+    return conditional_response(body, etag)
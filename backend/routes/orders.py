@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from models.order import Order
+from services.email_worker import wake_email_worker
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -21,6 +22,9 @@ def create_order():
         result = Order.create(customer_data, items, total_amount, payment_method)
         print(f"Order created successfully: {result}")
         
+        # Its emails are already in the outbox; send them now rather than at the next poll
+        wake_email_worker()
+        
         return jsonify(result), 201
         
     except Exception as e:
@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, request
 from models.product import Product
+from utils.http_cache import cached_response, conditional_json, listing_args
 
 products_bp = Blueprint('products', __name__)
 
 @products_bp.route('/', methods=['GET'])
+@cached_response('products:all', tags=('products', 'categories'), key_args=lambda: {'category_id': request.args.get('category_id')})
 def get_products():
     category_id = request.args.get('category_id')
     
@@ -15,26 +17,37 @@ def get_products():
     return jsonify(products)
 
 @products_bp.route('/featured', methods=['GET'])
+@cached_response('products:featured', tags=('featured', 'products'))
 def get_featured_products():
     """Get only featured products with lightweight data"""
     products = Product.get_featured_lightweight()
     return jsonify(products)
 
 @products_bp.route('/lightweight', methods=['GET'])
+@cached_response('products:lightweight', tags=('products',), key_args=listing_args)
 def get_products_lightweight():
     """Get products with only essential data for listings (faster loading)"""
-    category_id = request.args.get('category_id')
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 10))  # Default fallback, but frontend controls this
+    args = listing_args()
+    category_id = args['category_id']
+    page = args['page']
+    limit = args['limit']  # Default fallback, but frontend controls this
     
-    if category_id:
-        result = Product.get_by_category_lightweight(category_id, page, limit)
-    else:
-        result = Product.get_all_lightweight(page, limit)
+    # Keyset pagination: ?cursor= (empty for the first page) then ?cursor=<next_cursor>
+    cursor = args['cursor']
+    include_total = args['include_total']
+    
+    try:
+        if category_id:
+            result = Product.get_by_category_lightweight(category_id, page, limit, cursor, include_total)
+        else:
+            result = Product.get_all_lightweight(page, limit, cursor, include_total)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(result)
+    return conditional_json(result)
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@cached_response('products:detail', tags=lambda product_id: (f'product:{product_id}', 'product_details', 'categories'))
 def get_product(product_id):
     product = Product.get_by_id(product_id)
     if product:
@@ -42,7 +55,7 @@ def get_product(product_id):
         print(f"Product {product_id} specifications:")
         print(f"Type: {type(product.get('specifications'))}")
         print(f"Value: {product.get('specifications')}")
-        return jsonify(product)
+        return conditional_json(product)
     return jsonify({'error': 'Product not found'}), 404
 @products_bp.route('/<int:product_id>/discount', methods=['POST'])
 def apply_discount(product_id):
@@ -0,0 +1,147 @@
+import json
+import os
+import select
+import threading
+
+import psycopg2
+
+from utils.cache import invalidate_tags
+
+CHANNEL = 'cache_invalidation'
+
+# Cache tags affected by a change to each table
+TABLE_TAGS = {
+    'products': ('products',),
+    'discounts': ('products',),
+    'product_images': ('products',),
+    'banners': ('banners',),
+    'categories': ('categories',),
+    'gallery': ('gallery',),
+}
+
+# Tables whose rows belong to one product, and the payload field naming it
+PRODUCT_FIELDS = {
+    'products': 'id',
+    'discounts': 'product_id',
+    'product_images': 'product_id',
+}
+
+# Dropped with every product:<id> entry when notifications may have been missed
+RESYNC_TAGS = {tag for tags in TABLE_TAGS.values() for tag in tags} | {'product_details'}
+
+# Bumped on every write; an update touching nothing else changes no listing
+TIMESTAMP_COLUMNS = {'updated_at'}
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _affects_listings(data):
+    """Whether a product-table change can show up in the multi-product read models"""
+    changed = data.get('changed')
+    if changed is not None and set(changed) <= TIMESTAMP_COLUMNS:
+        return False
+    if data.get('table') == 'discounts':
+        # Listings only price in a product's active discount
+        return bool(data.get('is_active') or data.get('was_active'))
+    return True
+
+
+def tags_for_notification(payload):
+    """Map a notify_cache_invalidation() payload to the cache tags it invalidates"""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return ()
+
+    table = data.get('table')
+    field = PRODUCT_FIELDS.get(table)
+    if field is None:
+        return TABLE_TAGS.get(table, ())
+
+    tags = list(TABLE_TAGS[table]) if _affects_listings(data) else []
+    # The product detail response is tagged product:<id> and dropped on its own
+    if data.get(field) is not None:
+        tags.append(f'product:{data[field]}')
+    return tuple(tags)
+
+
+class CacheInvalidationListener(threading.Thread):
+    """
+    Background thread holding one dedicated LISTEN connection.
+    Every NOTIFY from the catalog triggers evicts exactly the tags it maps to,
+    so data changed by another process (or straight in the database) is
+    dropped from this process' cache without waiting for the TTL.
+    """
+
+    def __init__(self, dsn, poll_interval=5.0, retry_delay=5.0):
+        super().__init__(name='cache-invalidation-listener', daemon=True)
+        self.dsn = dsn
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                cur.execute(f'LISTEN {CHANNEL};')
+                cur.close()
+                print(f"Cache listener subscribed to '{CHANNEL}'")
+                self._listen(conn)
+            except Exception as e:
+                print(f"Cache listener error: {e}")
+                # Notifications may have been missed while disconnected
+                invalidate_tags(*RESYNC_TAGS)
+                self._stop_event.wait(self.retry_delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _listen(self, conn):
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([conn], [], [], self.poll_interval)
+            if not ready:
+                continue
+            conn.poll()
+            tags = set()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                tags.update(tags_for_notification(notify.payload))
+            if tags:
+                invalidate_tags(*tags)
+
+
+def start_cache_listener():
+    """
+    Start this process' listener once. Safe to call on every request:
+    after a fork (e.g. gunicorn workers) a new listener is started in the child.
+    """
+    global _listener, _listener_pid
+
+    if os.getenv('CACHE_LISTEN_NOTIFY', 'true').lower() != 'true':
+        return None
+
+    pid = os.getpid()
+    if _listener is not None and _listener_pid == pid:
+        return _listener
+
+    with _listener_lock:
+        if _listener is None or _listener_pid != pid:
+            database_url = os.getenv('DATABASE_URL')
+            if not database_url:
+                return None
+            _listener = CacheInvalidationListener(database_url)
+            _listener.start()
+            _listener_pid = pid
+    return _listener
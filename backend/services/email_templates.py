@@ -0,0 +1,424 @@
+from html import escape, unescape
+from string import Formatter
+from urllib.parse import urlencode
+import re
+
+# Contact details shown to EasyPaisa customers
+EASYPAISA_ACCOUNT = 'Muhammad Awais Raza - 03311339541'
+EASYPAISA_NUMBER = '03311339541'
+EASYPAISA_NAME = 'Muhammad Awais Raza'
+
+
+def format_price(price):
+    """Format a float price to PKR with comma separation and no unnecessary decimals"""
+    if price.is_integer():
+        return f"PKR {int(price):,}"
+    else:
+        return f"PKR {price:,.2f}"
+
+
+def _escape(value):
+    """html.escape() that skips its five replace() passes when there is nothing to escape"""
+    if '&' in value or '<' in value or '>' in value or '"' in value or "'" in value:
+        return escape(value)
+    return value
+
+
+class Template:
+    """
+    A layout compiled once into a Python function.
+
+    The source is parsed into its literal text and {field} slots a single
+    time, and turned into a function whose body is one f-string with the
+    literal parts inlined as constants: rendering is a single string build,
+    with no per-render parsing, segment walk or dict lookups.
+
+    - fill(*values): values in slot order, already escaped
+    - render(**values): by field name; HTML templates escape every value
+      except fields ending in `_html`, which hold already-rendered markup
+    """
+
+    def __init__(self, source, html=True):
+        literals = ['']
+        self.fields = []  # field names, in slot order
+        for literal, field, _, _ in Formatter().parse(source):
+            literals[-1] += literal
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"Template field must be a plain name: {{{field}}}")
+                self.fields.append(field)
+                literals.append('')
+
+        slots = [f'v{i}' for i in range(len(self.fields))]
+        self.fill = _compile('fill', literals, slots, ', '.join(slots))
+
+        names = list(dict.fromkeys(self.fields))
+        slots = [
+            f'_escape(str({field}))' if html and not field.endswith('_html') else field
+            for field in self.fields
+        ]
+        self.render = _compile('render', literals, slots, '*, ' + ', '.join(names) if names else '')
+
+
+def _compile(name, literals, slots, params):
+    """Build `def name(params): return f'<literal 0>{slot 0}<literal 1>...'`"""
+    body = literals[0].replace('{', '{{').replace('}', '}}')
+    for slot, literal in zip(slots, literals[1:]):
+        body += '{' + slot + '}' + literal.replace('{', '{{').replace('}', '}}')
+    namespace = {}
+    code = compile(f'def {name}({params}):\n    return f{body!r}\n', f'<template {name}>', 'exec')
+    exec(code, {'_escape': _escape}, namespace)
+    return namespace[name]
+
+
+def render_items(items):
+    """
+    (html, text) item rows. Prices are formatted once for both parts (and
+    not at all for the subtotal of a single unit), and the rows joined once.
+    """
+    fill_html = ITEM_ROW_HTML.fill
+    fill_text = ITEM_ROW_TEXT.fill
+    html_rows = []
+    text_rows = []
+    for item in items:
+        name = str(item['name'])
+        price = float(item['price'])
+        quantity = int(item['quantity'])
+        price_text = format_price(price)
+        subtotal_text = price_text if quantity == 1 else format_price(price * quantity)
+        # Slots are positional: name, quantity, price, subtotal
+        html_rows.append(fill_html(_escape(name), quantity, price_text, subtotal_text))
+        text_rows.append(fill_text(name, quantity, price_text, subtotal_text))
+    return ''.join(html_rows), ''.join(text_rows)
+
+
+ITEM_ROW_HTML = Template("""
+                        <div class="item">
+                            <strong>{name}</strong><br>
+                            Quantity: {quantity} × {price} = {subtotal}
+                        </div>
+""")
+
+ITEM_ROW_TEXT = Template("""- {name}: {quantity} × {price} = {subtotal}
+""", html=False)
+
+ORDER_CONFIRMATION_HTML = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background-color: #ea580c; color: white; padding: 20px; text-align: center; }}
+        .content {{ background-color: #f9fafb; padding: 30px; }}
+        .order-details {{ background-color: white; padding: 20px; margin: 20px 0; border-radius: 8px; }}
+        .item {{ padding: 10px 0; border-bottom: 1px solid #e5e7eb; }}
+        .total {{ font-size: 20px; font-weight: bold; color: #ea580c; margin-top: 20px; }}
+        .footer {{ text-align: center; padding: 20px; color: #6b7280; font-size: 14px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Sharp Lab by Owais</h1>
+            <p>Order Confirmation</p>
+        </div>
+
+        <div class="content">
+            <h2>Thank you for your order, {customer_name}!</h2>
+            <p>We've received your order and will contact you shortly to confirm the delivery details.</p>
+
+            <div class="order-details">
+                <h3>Order Number: #{order_number}</h3>
+                <p><strong>Payment Method:</strong> {payment_method}</p>
+                {account_html}
+
+                <h4>Order Items:</h4>
+{items_html}
+                <div class="total">
+                    Total Amount: {total}
+                </div>
+            </div>
+{instructions_html}
+            <p>If you have any questions, feel free to contact us.</p>
+        </div>
+
+        <div class="footer">
+            <p>Sharp Lab by Owais - Premium Knives</p>
+            <p>This is an automated email. Please do not reply to this email.</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+ORDER_CONFIRMATION_TEXT = Template("""Thank you for your order, {customer_name}!
+We've received your order and will contact you shortly to confirm the delivery details.
+
+Order Number: #{order_number}
+Payment Method: {payment_method}
+{account}
+Order Items:
+{items}
+Total Amount: {total}
+
+What's Next?
+{instructions}
+If you have any questions, feel free to contact us.
+
+Sharp Lab by Owais - Premium Knives
+This is an automated email. Please do not reply to this email.
+""", html=False)
+
+# Payment-specific parts never change, so they are plain strings
+CUSTOMER_ACCOUNT_HTML = {
+    'EasyPaisa': f'<p><strong>EasyPaisa Account:</strong> {EASYPAISA_ACCOUNT}</p>',
+}
+
+CUSTOMER_ACCOUNT_TEXT = {
+    'EasyPaisa': f'EasyPaisa Account: {EASYPAISA_ACCOUNT}\n',
+}
+
+CUSTOMER_INSTRUCTIONS = {
+    'EasyPaisa': [
+        f'Send payment via EasyPaisa to: {EASYPAISA_NUMBER} ({EASYPAISA_NAME})',
+        'Send us a screenshot of the payment confirmation',
+        "We'll confirm your order and start processing",
+        'Your order will be carefully packaged',
+        'Delivery within 3-5 business days after payment confirmation',
+    ],
+    'COD': [
+        'No advance payment required - Pay when delivered',
+        "We'll confirm your order and start processing",
+        'Your order will be carefully packaged',
+        'Our delivery person will contact you before delivery',
+        'Pay the exact amount when you receive your order',
+        'Delivery within 3-5 business days',
+    ],
+}
+
+
+def _instructions_html(lines):
+    # The first step is the one that matters, so it is bold
+    rows = [f'<li><strong>{escape(lines[0], quote=False)}</strong></li>']
+    rows += [f'<li>{escape(line, quote=False)}</li>' for line in lines[1:]]
+    rows = '\n                '.join(rows)
+    return f"""
+            <h3>What's Next?</h3>
+            <ul>
+                {rows}
+            </ul>
+"""
+
+
+CUSTOMER_INSTRUCTIONS_HTML = {method: _instructions_html(lines) for method, lines in CUSTOMER_INSTRUCTIONS.items()}
+CUSTOMER_INSTRUCTIONS_TEXT = {
+    method: ''.join(f'- {line}\n' for line in lines) for method, lines in CUSTOMER_INSTRUCTIONS.items()
+}
+
+ADMIN_NOTIFICATION_HTML = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background-color: #1f2937; color: white; padding: 20px; }}
+        .content {{ background-color: #f9fafb; padding: 30px; }}
+        .section {{ background-color: white; padding: 20px; margin: 20px 0; border-radius: 8px; }}
+        .item {{ padding: 10px 0; border-bottom: 1px solid #e5e7eb; }}
+        .total {{ font-size: 20px; font-weight: bold; color: #ea580c; margin-top: 20px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🔔 New Order Received!</h1>
+            <p>Order #{order_number}</p>
+        </div>
+
+        <div class="content">
+            <div class="section">
+                <h3>Customer Information</h3>
+                <p><strong>Name:</strong> {customer_name}</p>
+                <p><strong>Phone:</strong> {customer_phone}</p>
+                <p><strong>Email:</strong> {customer_email}</p>
+                <p><strong>Address:</strong> {delivery_address}</p>
+                <p><strong>City:</strong> {city}</p>
+                <p><strong>Payment Method:</strong> {payment_method}</p>
+            </div>
+
+            <div class="section">
+                <h3>Order Items</h3>
+{items_html}
+                <div class="total">
+                    Total Amount: {total}
+                </div>
+            </div>
+{instructions_html}
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+ADMIN_NOTIFICATION_TEXT = Template("""New Order Received! Order #{order_number}
+
+Customer Information
+Name: {customer_name}
+Phone: {customer_phone}
+Email: {customer_email}
+Address: {delivery_address}
+City: {city}
+Payment Method: {payment_method}
+
+Order Items
+{items}
+Total Amount: {total}
+
+{instructions}""", html=False)
+
+ADMIN_INSTRUCTIONS_HTML = {
+    'EasyPaisa': f"""
+            <div class="section">
+                <p><strong>Payment Method:</strong> EasyPaisa</p>
+                <p><strong>EasyPaisa Account:</strong> {EASYPAISA_ACCOUNT}</p>
+                <p style="color: #ea580c; font-weight: bold;">⚠️ Please contact the customer to confirm payment and order!</p>
+            </div>
+""",
+    'COD': """
+            <div class="section">
+                <p><strong>Payment Method:</strong> Cash on Delivery (COD)</p>
+                <p style="color: #16a34a; font-weight: bold;">✅ No advance payment required - Customer will pay on delivery</p>
+                <p style="color: #ea580c; font-weight: bold;">📞 Please contact the customer to confirm order and delivery details!</p>
+            </div>
+""",
+}
+
+ADMIN_INSTRUCTIONS_TEXT = {
+    'EasyPaisa': f'EasyPaisa Account: {EASYPAISA_ACCOUNT}\nPlease contact the customer to confirm payment and order!\n',
+    'COD': 'Cash on Delivery (COD): no advance payment required - customer will pay on delivery.\n'
+           'Please contact the customer to confirm order and delivery details!\n',
+}
+
+
+def render_order_confirmation(customer_name, order_number, items, total_amount, payment_method='COD'):
+    """(html, text) bodies of the customer's order confirmation"""
+    # Anything other than EasyPaisa is treated as cash on delivery
+    method = 'EasyPaisa' if payment_method == 'EasyPaisa' else 'COD'
+    total = format_price(float(total_amount))
+    items_html, items_text = render_items(items)
+    html_body = ORDER_CONFIRMATION_HTML.render(
+        customer_name=customer_name, order_number=order_number, payment_method=payment_method,
+        account_html=CUSTOMER_ACCOUNT_HTML.get(method, ''), items_html=items_html, total=total,
+        instructions_html=CUSTOMER_INSTRUCTIONS_HTML[method]
+    )
+    text_body = ORDER_CONFIRMATION_TEXT.render(
+        customer_name=customer_name, order_number=order_number, payment_method=payment_method,
+        account=CUSTOMER_ACCOUNT_TEXT.get(method, ''), items=items_text, total=total,
+        instructions=CUSTOMER_INSTRUCTIONS_TEXT[method]
+    )
+    return html_body, text_body
+
+
+def render_admin_notification(order_number, customer_name, customer_phone, customer_email, items,
+                              total_amount, delivery_address, city, payment_method='COD'):
+    """(html, text) bodies of the new-order notification for the admin"""
+    method = 'EasyPaisa' if payment_method == 'EasyPaisa' else 'COD'
+    total = format_price(float(total_amount))
+    items_html, items_text = render_items(items)
+    html_body = ADMIN_NOTIFICATION_HTML.render(
+        order_number=order_number, customer_name=customer_name, customer_phone=customer_phone,
+        customer_email=customer_email, delivery_address=delivery_address, city=city,
+        payment_method=payment_method, items_html=items_html, total=total,
+        instructions_html=ADMIN_INSTRUCTIONS_HTML[method]
+    )
+    text_body = ADMIN_NOTIFICATION_TEXT.render(
+        order_number=order_number, customer_name=customer_name, customer_phone=customer_phone,
+        customer_email=customer_email, delivery_address=delivery_address, city=city,
+        payment_method=payment_method, items=items_text, total=total,
+        instructions=ADMIN_INSTRUCTIONS_TEXT[method]
+    )
+    return html_body, text_body
+
+
+NEWSLETTER_HTML = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>{subject}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background-color: #ea580c; color: white; padding: 20px; text-align: center; }}
+        .content {{ background-color: #f9fafb; padding: 30px; }}
+        .footer {{ text-align: center; padding: 20px; color: #6b7280; font-size: 14px; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Sharp Lab by Owais</h1>
+        </div>
+
+        <div class="content">
+{content_html}
+        </div>
+
+        <div class="footer">
+            <p>Sharp Lab by Owais - Premium Knives</p>
+            <p>You are receiving this because you subscribed to our newsletter.
+               <a href="{unsubscribe_url}">Unsubscribe</a></p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+NEWSLETTER_TEXT = Template("""{content}
+
+--
+Sharp Lab by Owais - Premium Knives
+You are receiving this because you subscribed to our newsletter.
+Unsubscribe: {unsubscribe_url}
+""", html=False)
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def html_to_text(content_html):
+    """Rough plain-text version of an HTML fragment, for campaigns without a text body"""
+    text = re.sub(r'(?i)<br\s*/?>|</(p|div|h[1-6]|li)>', '\n', content_html)
+    text = unescape(_TAG_RE.sub('', text))
+    return re.sub(r'\n\s*\n+', '\n\n', text).strip()
+
+
+# Stands in for the subscriber's unsubscribe link while a campaign body is rendered
+_UNSUBSCRIBE_SLOT = '\x00unsubscribe\x00'
+
+
+def unsubscribe_link(base_url, email):
+    """The unsubscribe page URL for one subscriber"""
+    separator = '&' if '?' in base_url else '?'
+    return f"{base_url}{separator}{urlencode({'email': email})}"
+
+
+def render_newsletter(subject, content_html, content_text=None):
+    """
+    Render a newsletter campaign once. Returns personalize(unsubscribe_url),
+    which gives one subscriber's (html, text) bodies by only joining their
+    unsubscribe link into the pre-rendered parts.
+    """
+    html_parts = NEWSLETTER_HTML.render(
+        subject=subject, content_html=content_html.replace(_UNSUBSCRIBE_SLOT, ''),
+        unsubscribe_url=_UNSUBSCRIBE_SLOT
+    ).split(_UNSUBSCRIBE_SLOT)
+    text_parts = NEWSLETTER_TEXT.render(
+        content=(content_text or html_to_text(content_html)).replace(_UNSUBSCRIBE_SLOT, ''),
+        unsubscribe_url=_UNSUBSCRIBE_SLOT
+    ).split(_UNSUBSCRIBE_SLOT)
+
+    def personalize(unsubscribe_url):
+        return escape(unsubscribe_url).join(html_parts), unsubscribe_url.join(text_parts)
+
+    return personalize
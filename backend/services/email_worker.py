@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import threading
+import time
+
+from models.email_outbox import EmailOutbox
+from services.email_service import EmailService
+
+# Outbox kind -> message builder; the payload holds the builder's keyword arguments
+BUILDERS = {
+    'order_confirmation': EmailService.build_order_confirmation,
+    'admin_notification': EmailService.build_admin_notification,
+}
+
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+def build_outbox_email(email):
+    """The message for one outbox row"""
+    builder = BUILDERS.get(email['kind'])
+    if builder is None:
+        raise ValueError(f"Unknown email kind: {email['kind']}")
+    return builder(**email['payload'])
+
+
+def send_outbox_emails(messages):
+    """Send a batch over one pooled SMTP session; one error (or None) per message"""
+    if not EmailService.is_configured():
+        error = RuntimeError('Email credentials not configured')
+        return [error] * len(messages)
+    return EmailService.send_messages(messages)
+
+
+class EmailWorker(threading.Thread):
+    """
+    Drains the email_outbox table off the request path.
+
+    Orders write their emails to the outbox in the same transaction as the
+    order, so nothing is lost when a process exits before sending. A fixed
+    number of threads send them, each a batch of up to `batch_size` emails
+    over one pooled SMTP session; failures are retried with backoff and
+    rows left 'running' by a dead process are claimed again after the lock
+    timeout. Sent and failed rows older than `retention_days` are deleted
+    every `prune_interval` seconds (0 days keeps them forever).
+    """
+
+    def __init__(self, threads=2, batch_size=10, poll_interval=5.0, retry_delay=10.0,
+                 retention_days=30, prune_interval=3600.0):
+        super().__init__(name='email-worker', daemon=True)
+        self.threads = max(threads, 1)
+        self.batch_size = max(batch_size, 1)
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.retention_days = retention_days
+        self.prune_interval = prune_interval
+        self._pruned_at = None
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        """Check the outbox now instead of at the next poll"""
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='email-send') as pool:
+            while not self._stop_event.is_set():
+                self._prune()
+                try:
+                    emails = EmailOutbox.claim(self.threads * self.batch_size)
+                except Exception as e:
+                    print(f"Email worker could not claim emails: {e}")
+                    self._stop_event.wait(self.retry_delay)
+                    continue
+
+                if not emails:
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+                    continue
+
+                self._run_batch(pool, emails)
+
+    def _prune(self):
+        """Drop old sent and failed rows, at most once per prune interval"""
+        if self.retention_days <= 0:
+            return
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = now
+        try:
+            removed = EmailOutbox.prune(self.retention_days)
+            if removed:
+                print(f"Email worker pruned {removed} outbox rows older than {self.retention_days} days")
+        except Exception as e:
+            # Tried again at the next interval
+            print(f"Email worker could not prune the outbox: {e}")
+
+    def _run_batch(self, pool, emails):
+        messages = []
+        for email in emails:
+            try:
+                messages.append((email, build_outbox_email(email)))
+            except Exception as e:
+                self._failed(email, e)
+
+        # Spread the messages over the sender threads, one SMTP session each
+        chunk_size = -(-len(messages) // self.threads) or 1
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        futures = {pool.submit(send_outbox_emails, [msg for _, msg in chunk]): chunk for chunk in chunks}
+
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                errors = future.result()
+            except Exception as e:
+                errors = [e] * len(chunk)
+
+            for (email, _), error in zip(chunk, errors):
+                if error is not None:
+                    self._failed(email, error)
+                    continue
+                try:
+                    EmailOutbox.complete(email['id'])
+                except Exception as e:
+                    # Left 'running'; sent again after the lock timeout
+                    print(f"Email worker could not mark email {email['id']} sent: {e}")
+
+    def _failed(self, email, error):
+        try:
+            status = EmailOutbox.fail(email, error)
+            print(f"Email {email['id']} ({email['kind']}) {status} after attempt {email['attempts']}: {error}")
+        except Exception as db_error:
+            # Left 'running'; it is claimed again after the lock timeout
+            print(f"Email worker could not record failure of email {email['id']}: {db_error}")
+
+
+def _create_worker():
+    return EmailWorker(
+        threads=int(os.getenv('EMAIL_WORKER_THREADS', 2)),
+        batch_size=int(os.getenv('EMAIL_BATCH_SIZE', 10)),
+        retention_days=int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', 30))
+    )
+
+
+def start_email_worker():
+    """
+    Start this process' embedded worker once (again after a fork).
+    Set EMAIL_WORKER_EMBEDDED=false when running `python -m services.email_worker` separately.
+    """
+    global _worker, _worker_pid
+
+    if os.getenv('EMAIL_WORKER_EMBEDDED', 'true').lower() != 'true':
+        return None
+
+    pid = os.getpid()
+    if _worker is not None and _worker_pid == pid:
+        return _worker
+
+    with _worker_lock:
+        if _worker is None or _worker_pid != pid:
+            _worker = _create_worker()
+            _worker.start()
+            _worker_pid = pid
+    return _worker
+
+
+def wake_email_worker():
+    """Tell the local worker that new emails were queued"""
+    worker = _worker if _worker_pid == os.getpid() else None
+    if worker is not None:
+        worker.wake()
+
+
+if __name__ == '__main__':
+    worker = _create_worker()
+    print(f"Email worker started with {worker.threads} threads")
+    worker.run()
@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+import os
+import threading
+
+from models.image_job import ImageJob
+from utils.image_variants import process_image
+
+_worker = None
+_worker_pid = None
+_worker_lock = threading.Lock()
+
+
+class ImageWorker(threading.Thread):
+    """
+    Drains the image_jobs queue off the request path.
+
+    Jobs are claimed in batches (SKIP LOCKED, so several app processes or a
+    standalone worker can share the queue) and decoded, resized and encoded
+    in a pool of worker processes, so CPU-heavy Pillow work neither holds
+    the GIL of the web process nor delays upload responses.
+    """
+
+    def __init__(self, processes=2, poll_interval=2.0, retry_delay=5.0):
+        super().__init__(name='image-worker', daemon=True)
+        self.processes = max(processes, 1)
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        """Check the queue now instead of at the next poll"""
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        # Forking this multi-threaded process could copy held locks (DB pool, cache) into a child;
+        # forkserver/spawn children start from a clean interpreter instead
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=context) as pool:
+            while not self._stop_event.is_set():
+                try:
+                    jobs = ImageJob.claim(self.processes)
+                except Exception as e:
+                    print(f"Image worker could not claim jobs: {e}")
+                    self._stop_event.wait(self.retry_delay)
+                    continue
+
+                if not jobs:
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+                    continue
+
+                self._run_batch(pool, jobs)
+
+    def _run_batch(self, pool, jobs):
+        futures = {pool.submit(process_image, job['image_name']): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                ImageJob.complete(job, future.result())
+                print(f"Image job {job['id']} done: {job['image_name']}")
+            except Exception as e:
+                try:
+                    status = ImageJob.fail(job, e)
+                    print(f"Image job {job['id']} {status} after attempt {job['attempts']}: {e}")
+                except Exception as db_error:
+                    # Left 'running'; it is claimed again after the lock timeout
+                    print(f"Image worker could not record failure of job {job['id']}: {db_error}")
+
+
+def start_image_worker():
+    """
+    Start this process' embedded worker once (again after a fork).
+    Set IMAGE_WORKER_EMBEDDED=false when running `python -m services.image_worker` separately.
+    """
+    global _worker, _worker_pid
+
+    if os.getenv('IMAGE_WORKER_EMBEDDED', 'true').lower() != 'true':
+        return None
+
+    pid = os.getpid()
+    if _worker is not None and _worker_pid == pid:
+        return _worker
+
+    with _worker_lock:
+        if _worker is None or _worker_pid != pid:
+            _worker = ImageWorker(processes=int(os.getenv('IMAGE_WORKER_PROCESSES', 2)))
+            _worker.start()
+            _worker_pid = pid
+    return _worker
+
+
+def wake_image_worker():
+    """Tell the local worker that new jobs were queued"""
+    worker = _worker if _worker_pid == os.getpid() else None
+    if worker is not None:
+        worker.wake()
+
+
+if __name__ == '__main__':
+    worker = ImageWorker(processes=int(os.getenv('IMAGE_WORKER_PROCESSES', 2)))
+    print(f"Image worker started with {worker.processes} processes")
+    worker.run()
@@ -0,0 +1,257 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+import os
+import threading
+import time
+
+from models.newsletter_campaign import NewsletterCampaign
+from services.email_service import EmailService
+from services.email_templates import render_newsletter, unsubscribe_link
+
+_sender = None
+_sender_pid = None
+_sender_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Spaces calls to wait() at least 1/rate seconds apart, across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class LockLost(Exception):
+    """Another sender took the campaign over after this one missed the lock timeout"""
+
+
+class NewsletterSender(threading.Thread):
+    """
+    Sends running newsletter campaigns.
+
+    Subscribers are read in batches with a keyset query from the checkpoint.
+    The body is rendered once per campaign and only each subscriber's
+    unsubscribe link is filled in per message; each batch is split between
+    `concurrency` threads that deliver over pooled SMTP sessions, all sharing
+    one rate limit. After every batch the per-recipient results and the
+    checkpoint (last subscriber id) are committed together, so a paused,
+    crashed or restarted sender resumes where it stopped; at most the batch
+    in flight is sent again. The campaign lock is renewed while a batch is
+    sent, so a slow rate never lets another sender take the campaign over.
+    A sender that stalled for longer than the lock timeout and lost the lock
+    stops as soon as it notices, without recording or sending anything more.
+    """
+
+    def __init__(self, concurrency=2, batch_size=50, rate=5.0, lock_timeout=300,
+                 poll_interval=30.0, retry_delay=30.0):
+        super().__init__(name='newsletter-sender', daemon=True)
+        self.concurrency = max(concurrency, 1)
+        self.batch_size = max(batch_size, 1)
+        self.limiter = RateLimiter(rate)
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.unsubscribe_url = os.getenv('NEWSLETTER_UNSUBSCRIBE_URL', '')
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._heartbeat_lock = threading.Lock()
+        self._heartbeat_at = 0.0
+        self._lock_lost = threading.Event()
+
+    def wake(self):
+        """Check for started campaigns now instead of at the next poll"""
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='newsletter-send') as pool:
+            while not self._stop_event.is_set():
+                try:
+                    campaign = NewsletterCampaign.claim(self.lock_timeout)
+                except Exception as e:
+                    print(f"Newsletter sender could not claim a campaign: {e}")
+                    self._stop_event.wait(self.retry_delay)
+                    continue
+
+                if campaign is None:
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+                    continue
+
+                try:
+                    self._send_campaign(pool, campaign)
+                except Exception as e:
+                    # Still 'running': picked up again once the lock is released
+                    print(f"Newsletter campaign {campaign['id']} interrupted: {e}")
+                    self._release(campaign)
+                    self._stop_event.wait(self.retry_delay)
+
+    def _send_campaign(self, pool, campaign):
+        # Every newsletter must let the subscriber opt out
+        if not self.unsubscribe_url:
+            NewsletterCampaign.pause(campaign['id'], 'NEWSLETTER_UNSUBSCRIBE_URL is not set')
+            self._release(campaign)
+            print(f"Newsletter campaign {campaign['id']} paused: NEWSLETTER_UNSUBSCRIBE_URL is not set")
+            return
+
+        # Rendered once; each message only adds the subscriber's unsubscribe link
+        personalize = render_newsletter(campaign['subject'], campaign['content_html'], campaign['content_text'])
+
+        print(f"Sending newsletter campaign {campaign['id']} from subscriber {campaign['last_subscriber_id']}")
+        self._heartbeat_at = time.monotonic()
+        self._lock_lost.clear()
+        last_subscriber_id = campaign['last_subscriber_id']
+        while True:
+            batch = NewsletterCampaign.next_subscribers(last_subscriber_id, self.batch_size)
+            if not batch:
+                break
+            if self._stop_event.is_set():
+                self._release(campaign)
+                return
+
+            errors = self._send_batch(pool, campaign, batch, personalize)
+            if self._lock_lost.is_set():
+                print(f"Newsletter campaign {campaign['id']} was taken over by another sender")
+                return
+
+            # Nothing got through (SMTP down, bad credentials): pause instead of failing the whole list
+            if all(errors):
+                NewsletterCampaign.pause(campaign['id'], f'Every send in a batch failed: {errors[0]}')
+                self._release(campaign)
+                print(f"Newsletter campaign {campaign['id']} paused: {errors[0]}")
+                return
+
+            deliveries = [(row['id'], row['email'], error) for row, error in zip(batch, errors)]
+            progress = NewsletterCampaign.record_batch(campaign['id'], campaign['locked_by'], deliveries)
+            if progress is None:
+                print(f"Newsletter campaign {campaign['id']} was taken over by another sender")
+                return
+            if progress['status'] != 'running':
+                self._release(campaign)
+                print(f"Newsletter campaign {campaign['id']} stopped: {progress['status']}")
+                return
+            self._heartbeat_at = time.monotonic()
+            last_subscriber_id = progress['last_subscriber_id']
+
+        if NewsletterCampaign.finish(campaign['id'], campaign['locked_by']):
+            print(f"Newsletter campaign {campaign['id']} done")
+        else:
+            print(f"Newsletter campaign {campaign['id']} was taken over or stopped before it finished")
+
+    def _send_batch(self, pool, campaign, batch, personalize):
+        """One error (or None) per subscriber in the batch"""
+        messages = [self._message(campaign, row['email'], personalize) for row in batch]
+
+        # One chunk per sender thread, each over its own pooled SMTP session
+        chunk_size = -(-len(messages) // self.concurrency)
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        before_send = partial(self._before_send, campaign)
+        futures = [pool.submit(EmailService.send_messages, chunk, before_send) for chunk in chunks]
+
+        errors = []
+        for future, chunk in zip(futures, chunks):
+            try:
+                errors.extend(future.result())
+            except Exception as e:
+                errors.extend([e] * len(chunk))
+        return errors
+
+    def _before_send(self, campaign):
+        """
+        Rate limit every message and renew the campaign lock a few times per
+        lock timeout. Raises LockLost, which ends the chunk, once the lock is gone.
+        """
+        if self._lock_lost.is_set():
+            raise LockLost(f"Lost the lock on campaign {campaign['id']}")
+        self.limiter.wait()
+        with self._heartbeat_lock:
+            if time.monotonic() - self._heartbeat_at < self.lock_timeout / 3:
+                return
+            self._heartbeat_at = time.monotonic()
+        try:
+            status = NewsletterCampaign.heartbeat(campaign['id'], campaign['locked_by'])
+        except Exception as e:
+            print(f"Newsletter sender could not renew the lock on campaign {campaign['id']}: {e}")
+            return
+        if status is None:
+            self._lock_lost.set()
+            raise LockLost(f"Lost the lock on campaign {campaign['id']}")
+
+    def _message(self, campaign, email, personalize):
+        unsubscribe_url = unsubscribe_link(self.unsubscribe_url, email)
+        html_body, text_body = personalize(unsubscribe_url)
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = campaign['subject']
+        msg['From'] = EmailService.sender()
+        msg['To'] = email
+        msg['List-Unsubscribe'] = f'<{unsubscribe_url}>'
+        msg.attach(MIMEText(text_body, 'plain'))
+        msg.attach(MIMEText(html_body, 'html'))
+        return msg
+
+    def _release(self, campaign):
+        try:
+            NewsletterCampaign.release(campaign['id'], campaign['locked_by'])
+        except Exception as e:
+            # Taken over by any sender after the lock timeout
+            print(f"Newsletter sender could not release campaign {campaign['id']}: {e}")
+
+
+def _create_sender():
+    return NewsletterSender(
+        concurrency=int(os.getenv('NEWSLETTER_CONCURRENCY', 2)),
+        batch_size=int(os.getenv('NEWSLETTER_BATCH_SIZE', 50)),
+        rate=float(os.getenv('NEWSLETTER_RATE', 5)),
+        lock_timeout=int(os.getenv('NEWSLETTER_LOCK_TIMEOUT', 300))
+    )
+
+
+def start_newsletter_sender():
+    """
+    Start this process' embedded sender once (again after a fork).
+    Set NEWSLETTER_SENDER_EMBEDDED=false when running `python -m services.newsletter_sender` separately.
+    """
+    global _sender, _sender_pid
+
+    if os.getenv('NEWSLETTER_SENDER_EMBEDDED', 'true').lower() != 'true':
+        return None
+
+    pid = os.getpid()
+    if _sender is not None and _sender_pid == pid:
+        return _sender
+
+    with _sender_lock:
+        if _sender is None or _sender_pid != pid:
+            _sender = _create_sender()
+            _sender.start()
+            _sender_pid = pid
+    return _sender
+
+
+def wake_newsletter_sender():
+    """Tell the local sender that a campaign was started"""
+    sender = _sender if _sender_pid == os.getpid() else None
+    if sender is not None:
+        sender.wake()
+
+
+if __name__ == '__main__':
+    sender = _create_sender()
+    print(f"Newsletter sender started: {sender.concurrency} threads, batches of {sender.batch_size}")
+    sender.run()
@@ -0,0 +1,190 @@
+from contextlib import contextmanager
+import os
+import smtplib
+import threading
+import time
+
+# Errors after which an SMTP session can't be used any more
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+class SMTPPool:
+    """
+    Reusable, authenticated SMTP sessions.
+
+    Opening a session costs a TCP connect, a STARTTLS handshake and a login,
+    so sessions are kept open and handed out again. A session idle for longer
+    than `check_after` seconds is checked with NOOP before reuse, one idle for
+    longer than `idle_timeout` is closed (servers drop idle clients anyway),
+    and at most `max_size` sessions are open at once.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_size=4, idle_timeout=60, check_after=15, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.timeout = timeout
+        self._idle = []  # (smtp, last_used), most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            # A local debugging server doesn't offer AUTH and needs no login
+            smtp.ehlo_or_helo_if_needed()
+            if self.username and smtp.has_extn('auth'):
+                smtp.login(self.username, self.password)
+        except Exception:
+            _close(smtp)
+            raise
+        return smtp
+
+    def _checkout(self):
+        """Most recently used healthy idle session, or a new one"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                smtp, last_used = self._idle.pop()
+
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                _close(smtp)
+                continue
+            if idle_for > self.check_after and not _is_alive(smtp):
+                _close(smtp)
+                continue
+            return smtp
+
+        return self._connect()
+
+    def _checkin(self, smtp):
+        with self._lock:
+            self._idle.append((smtp, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a session. It only goes back to the pool if the block finished
+        cleanly; after any exception its state is unknown, so it is closed.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError('No SMTP connection became available')
+        try:
+            smtp = self._checkout()
+            try:
+                yield smtp
+            except BaseException:
+                _close(smtp)
+                raise
+            else:
+                self._checkin(smtp)
+        finally:
+            self._slots.release()
+
+    def send_many(self, messages, before_send=None):
+        """
+        Send several messages over one session.
+        Returns one entry per message: None if it was accepted, else the exception.
+        A dropped connection is re-established once per batch.
+        `before_send()` is called before each message (e.g. to apply a rate limit).
+        """
+        errors = [None] * len(messages)
+        pending = 0
+        reconnected = False
+
+        while pending < len(messages):
+            try:
+                with self.connection() as smtp:
+                    while pending < len(messages):
+                        if before_send is not None:
+                            before_send()
+                        try:
+                            smtp.send_message(messages[pending])
+                        except CONNECTION_ERRORS:
+                            raise
+                        except smtplib.SMTPException as e:
+                            # Refused by the server: record it and carry on with the same session
+                            errors[pending] = e
+                            _reset(smtp)
+                        pending += 1
+            except Exception as e:
+                if reconnected or not isinstance(e, CONNECTION_ERRORS):
+                    for i in range(pending, len(messages)):
+                        errors[i] = e
+                    break
+                reconnected = True
+
+        return errors
+
+    def send(self, message):
+        """Send one message, raising if it was not accepted"""
+        error = self.send_many([message])[0]
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Close all idle sessions"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            _close(smtp)
+
+
+def _is_alive(smtp):
+    try:
+        return smtp.noop()[0] == 250
+    except Exception:
+        return False
+
+
+def _reset(smtp):
+    try:
+        smtp.rset()
+    except Exception:
+        pass
+
+
+def _close(smtp):
+    try:
+        smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+def get_smtp_pool():
+    """This process' pool, configured from the MAIL_* and SMTP_* settings (recreated after a fork)"""
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = SMTPPool(
+                host=os.getenv('MAIL_SERVER', 'smtp.gmail.com'),
+                port=int(os.getenv('MAIL_PORT', 587)),
+                username=os.getenv('MAIL_USERNAME'),
+                password=os.getenv('MAIL_PASSWORD'),
+                use_tls=os.getenv('MAIL_USE_TLS', 'true').lower() == 'true',
+                max_size=int(os.getenv('SMTP_POOL_SIZE', 4)),
+                idle_timeout=int(os.getenv('SMTP_IDLE_TIMEOUT', 60)),
+                check_after=int(os.getenv('SMTP_CHECK_AFTER', 15)),
+                timeout=int(os.getenv('SMTP_TIMEOUT', 30))
+            )
+            _pool_pid = pid
+    return _pool
@@ -0,0 +1,211 @@
+import time
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import Cache, MemoryBackend, RedisBackend
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def redis_backend():
+    fakeredis = pytest.importorskip('fakeredis')
+    backend = RedisBackend('redis://localhost:6379/0', prefix='test:')
+    backend._client = fakeredis.FakeRedis()
+    return backend
+
+
+# MemoryBackend
+
+def test_memory_entry_expires_after_its_ttl(clock):
+    backend = MemoryBackend()
+    backend.set('a', 1, ttl=10)
+
+    clock.now += 9
+    assert backend.get_many(['a']) == [1]
+
+    clock.now += 2
+    assert backend.get_many(['a']) == [None]
+    assert backend.stats()['entries'] == 0
+
+
+def test_memory_evicts_least_recently_used(clock):
+    backend = MemoryBackend(maxsize=2)
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+
+    # Reading 'a' makes 'b' the least recently used entry
+    backend.get_many(['a'])
+    backend.set('c', 3, ttl=60)
+
+    assert backend.get_many(['a', 'b', 'c']) == [1, None, 3]
+    assert backend.evictions == 1
+
+
+def test_memory_tag_versions_are_never_evicted(clock):
+    backend = MemoryBackend(maxsize=1)
+    backend.add('tag:products', 'v1')
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+
+    assert backend.get_many(['tag:products', 'a', 'b']) == ['v1', None, 2]
+
+
+def test_memory_add_keeps_existing_value():
+    backend = MemoryBackend()
+    backend.add('tag:products', 'v1')
+    backend.add('tag:products', 'v2')
+
+    assert backend.get_many(['tag:products']) == ['v1']
+
+
+# RedisBackend
+
+def test_redis_entry_expires_after_its_ttl(redis_backend):
+    redis_backend.set('a', {'value': 1}, ttl=1)
+    assert redis_backend.get_many(['a']) == [{'value': 1}]
+
+    time.sleep(1.1)
+    assert redis_backend.get_many(['a']) == [None]
+
+
+def test_redis_values_without_ttl_persist(redis_backend):
+    redis_backend.set('tag:products', 'v1')
+
+    assert redis_backend._client.ttl('test:tag:products') == -1
+    assert redis_backend.get_many(['tag:products']) == ['v1']
+
+
+def test_redis_clear_only_drops_prefixed_keys(redis_backend):
+    redis_backend.set('a', 1, ttl=60)
+    redis_backend._client.set('other:a', b'kept')
+
+    redis_backend.clear()
+
+    assert redis_backend.get_many(['a']) == [None]
+    assert redis_backend._client.get('other:a') == b'kept'
+
+
+# Cache (tag invalidation), on both backends
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request):
+    if request.param == 'memory':
+        return MemoryBackend()
+    return request.getfixturevalue('redis_backend')
+
+
+def test_hit_after_set(backend):
+    cache = Cache(backend)
+    hit, _, versions = cache.lookup('k', ('products',))
+    assert not hit
+
+    cache.set('k', 'value', tags=('products',), versions=versions)
+
+    assert cache.lookup('k', ('products',))[:2] == (True, 'value')
+
+
+def test_invalidated_tag_turns_entries_into_misses(backend):
+    cache = Cache(backend)
+    cache.set('listing', 'old', tags=('products',))
+    cache.set('banners', 'kept', tags=('banners',))
+
+    cache.invalidate_tags('products')
+
+    assert cache.get('listing', tags=('products',)) is None
+    assert cache.get('banners', tags=('banners',)) == 'kept'
+
+
+def test_value_loaded_before_an_invalidation_is_not_stored_as_fresh(backend):
+    cache = Cache(backend)
+    # First lookup of a brand-new tag: its token must exist before the value is loaded
+    hit, _, versions = cache.lookup('listing', ('products',))
+    assert not hit and None not in versions
+
+    # Another writer changes the data while this caller is still loading
+    cache.invalidate_tags('products')
+    cache.set('listing', 'stale', tags=('products',), versions=versions)
+
+    assert cache.get('listing', tags=('products',)) is None
+
+
+def test_invalidation_is_seen_by_every_cache_sharing_the_backend(backend):
+    worker_a = Cache(backend)
+    worker_b = Cache(backend)
+    worker_a.set('listing', 'old', tags=('products',))
+    assert worker_b.get('listing', tags=('products',)) == 'old'
+
+    worker_b.invalidate_tags('products')
+
+    assert worker_a.get('listing', tags=('products',)) is None
+
+
+def test_cached_decorator_loads_once_until_invalidated(monkeypatch):
+    shared = Cache(MemoryBackend())
+    monkeypatch.setattr(cache_module, 'cache', shared)
+    calls = []
+
+    @cache_module.cached('products:all', tags=('products',))
+    def load(category_id=None):
+        calls.append(category_id)
+        return [category_id]
+
+    assert load(category_id=1) == [1]
+    assert load(category_id=1) == [1]
+    assert load(category_id=2) == [2]
+    assert calls == [1, 2]
+
+    cache_module.invalidate_tags('products')
+    load(category_id=1)
+    assert calls == [1, 2, 1]
+
+
+def test_cached_decorator_does_not_store_after_a_failed_lookup(monkeypatch):
+    class FlakyBackend(MemoryBackend):
+        fail_reads = True
+
+        def get_many(self, keys):
+            if self.fail_reads:
+                raise ConnectionError('cache down')
+            return super().get_many(keys)
+
+    backend = FlakyBackend()
+    shared = Cache(backend)
+    monkeypatch.setattr(cache_module, 'cache', shared)
+
+    @cache_module.cached('products:all', tags=('products',))
+    def load():
+        # Another writer invalidates while this (unversioned) value is being loaded
+        backend.fail_reads = False
+        shared.invalidate_tags('products')
+        return 'stale'
+
+    assert load() == 'stale'
+    assert shared.get('products:all', tags=('products',)) is None
+
+
+def test_backend_outage_falls_through_to_the_loader():
+    class BrokenBackend(MemoryBackend):
+        def get_many(self, keys):
+            raise ConnectionError('cache down')
+
+    cache = Cache(BrokenBackend())
+
+    assert cache.lookup('k', ('products',)) == (False, None, None)
+    assert cache.stats()['errors'] == 1
@@ -0,0 +1,164 @@
+from email.message import EmailMessage
+import smtplib
+import socketserver
+import threading
+
+import pytest
+
+from services import smtp_pool as smtp_pool_module
+from services.smtp_pool import SMTPPool
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Local SMTP server that accepts everything except recipients containing 'reject'"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.sessions = 0
+        self.commands = []
+        self.messages = []
+        # 1-based number of a message whose MAIL command makes the server hang up (once)
+        self.drop_on_message = None
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        self.reply('220 sink ready')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(' ', 1)[0].upper()
+            with server.lock:
+                server.commands.append(verb)
+
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 sink')
+            elif verb == 'MAIL':
+                if server.drop_on_message == len(server.messages) + 1:
+                    server.drop_on_message = None
+                    return
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                self.reply('550 No such user' if 'reject' in command else '250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b''):
+                        break
+                    data.append(data_line)
+                with server.lock:
+                    server.messages.append(b''.join(data))
+                self.reply('250 OK')
+            elif verb in ('NOOP', 'RSET'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Not implemented')
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink()
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool(sink):
+    pool = SMTPPool('127.0.0.1', sink.server_address[1], use_tls=False,
+                    idle_timeout=60, check_after=15, timeout=5)
+    yield pool
+    pool.close()
+
+
+def message(to='customer@example.com', subject='Order'):
+    msg = EmailMessage()
+    msg['From'] = 'shop@example.com'
+    msg['To'] = to
+    msg['Subject'] = subject
+    msg.set_content('Thanks for your order')
+    return msg
+
+
+def test_batch_goes_over_one_session(sink, pool):
+    errors = pool.send_many([message(subject=f'Order {i}') for i in range(3)])
+
+    assert errors == [None, None, None]
+    assert len(sink.messages) == 3
+    assert sink.sessions == 1
+
+
+def test_idle_session_is_reused_and_checked_after_check_after(sink, pool, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(smtp_pool_module.time, 'monotonic', clock)
+
+    pool.send(message())
+    clock.now += 10
+    pool.send(message())
+    assert sink.sessions == 1
+    assert 'NOOP' not in sink.commands
+
+    # Idle for longer than check_after: NOOP before reuse, still the same session
+    clock.now += 20
+    pool.send(message())
+    assert sink.sessions == 1
+    assert sink.commands.count('NOOP') == 1
+
+    # Idle for longer than idle_timeout: closed and replaced
+    clock.now += 61
+    pool.send(message())
+    assert sink.sessions == 2
+    assert len(sink.messages) == 4
+
+
+def test_reconnects_once_when_the_server_drops_the_connection(sink, pool):
+    sink.drop_on_message = 2
+
+    errors = pool.send_many([message(subject=f'Order {i}') for i in range(3)])
+
+    assert errors == [None, None, None]
+    assert len(sink.messages) == 3
+    assert sink.sessions == 2
+
+
+def test_refused_message_does_not_abort_the_batch(sink, pool):
+    errors = pool.send_many([
+        message(),
+        message(to='reject@example.com'),
+        message()
+    ])
+
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], smtplib.SMTPException)
+    assert len(sink.messages) == 2
+    assert sink.sessions == 1
@@ -0,0 +1,294 @@
+from collections import OrderedDict
+from functools import wraps
+import os
+import pickle
+import threading
+import time
+import uuid
+
+
+class MemoryBackend:
+    """
+    Bounded thread-safe in-process store.
+
+    - every entry expires after its own TTL
+    - once `maxsize` entries are stored the least recently used one is evicted
+    - entries stored without a TTL (tag versions) are kept outside the LRU and never evicted
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._persistent = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                if key in self._persistent:
+                    values.append(self._persistent[key])
+                    continue
+                entry = self._data.get(key)
+                if entry is None:
+                    values.append(None)
+                elif entry[1] <= now:
+                    del self._data[key]
+                    values.append(None)
+                else:
+                    self._data.move_to_end(key)
+                    values.append(entry[0])
+        return values
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if ttl is None:
+                self._persistent[key] = value
+                return
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value):
+        """Store a non-expiring value unless the key already exists"""
+        with self._lock:
+            self._persistent.setdefault(key, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._persistent.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._persistent.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._data),
+                'maxsize': self.maxsize,
+                'evictions': self.evictions
+            }
+
+
+class RedisBackend:
+    """
+    Networked key-value store shared by every worker process.
+    Works against any Redis-protocol server (e.g. a local redis-server for development).
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url, prefix='sharplab:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)")
+
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+
+    def get_many(self, keys):
+        raw_values = self._client.mget([self.prefix + key for key in keys])
+        return [pickle.loads(raw) if raw is not None else None for raw in raw_values]
+
+    def set(self, key, value, ttl=None):
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if ttl is None:
+            self._client.set(self.prefix + key, raw)
+        else:
+            self._client.set(self.prefix + key, raw, ex=max(int(ttl), 1))
+
+    def add(self, key, value):
+        self._client.set(self.prefix + key, pickle.dumps(value), nx=True)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + '*', count=500))
+        if keys:
+            self._client.delete(*keys)
+
+    def stats(self):
+        return {
+            'backend': 'redis',
+            'url': self.url.split('@')[-1],
+            'entries': self._client.dbsize()
+        }
+
+
+class Cache:
+    """
+    Read-model cache on top of a pluggable backend.
+
+    Tags are invalidated through version tokens stored in the backend itself:
+    every entry remembers the token of each of its tags when it was written,
+    and invalidate_tags() replaces those tokens. With a shared backend every
+    worker sees the new token on its next lookup, so invalidation propagates
+    across processes without any messaging.
+    """
+
+    def __init__(self, backend, default_ttl=300):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def _tag_key(tag):
+        return f'tag:{tag}'
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _versions(self, tags):
+        """Current token of each tag; tags seen for the first time get an initial token"""
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        versions = self.backend.get_many(tag_keys)
+        if None in versions:
+            for tag_key, version in zip(tag_keys, versions):
+                if version is None:
+                    self.backend.add(tag_key, uuid.uuid4().hex)
+            versions = self.backend.get_many(tag_keys)
+        return tuple(versions)
+
+    def lookup(self, key, tags=()):
+        """
+        Return (hit, value, versions). On a miss, `versions` are the tag tokens
+        read BEFORE the caller loads the value: pass them back to set() so a
+        value computed from data read before an invalidation is never stored
+        as fresh. They are None if the backend could not be read; callers then
+        skip the store.
+        """
+        tags = tuple(tags)
+        try:
+            entry, *versions = self.backend.get_many([key] + [self._tag_key(tag) for tag in tags])
+            versions = tuple(versions)
+            if None in versions:
+                versions = self._versions(tags)
+        except Exception as e:
+            # A cache outage must never take the site down; fall through to the database
+            with self._lock:
+                self.errors += 1
+            print(f"Cache lookup failed for {key}: {e}")
+            return False, None, None
+
+        if entry is not None:
+            value, stored_versions = entry
+            if stored_versions == versions:
+                self._count(True)
+                return True, value, versions
+        self._count(False)
+        return False, None, versions
+
+    def get(self, key, default=None, tags=()):
+        hit, value, _ = self.lookup(key, tags)
+        return value if hit else default
+
+    def set(self, key, value, ttl=None, tags=(), versions=None):
+        """
+        Store `value` under the tag `versions` returned by lookup(). Without
+        them the current tokens are used, so an invalidation that happened
+        while the value was computed would go unnoticed.
+        """
+        tags = tuple(tags)
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            if versions is None:
+                versions = self._versions(tags)
+            self.backend.set(key, (value, versions), ttl)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Cache store failed for {key}: {e}")
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def invalidate_tags(self, *tags):
+        for tag in tags:
+            self.backend.set(self._tag_key(tag), uuid.uuid4().hex)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+        try:
+            stats.update(self.backend.stats())
+        except Exception as e:
+            stats['backend_error'] = str(e)
+        return stats
+
+
+def create_cache_backend():
+    """Pick the cache backend from CACHE_BACKEND ('memory' or 'redis')"""
+    backend = os.getenv('CACHE_BACKEND', 'memory').lower()
+    if backend == 'redis':
+        return RedisBackend(os.getenv('CACHE_URL', 'redis://localhost:6379/0'))
+    return MemoryBackend(maxsize=int(os.getenv('CACHE_MAX_ENTRIES', 1024)))
+
+
+# Shared cache for public read models (categories, banners, gallery, featured products, listing totals).
+# Admin writes drop entries by tag; the TTL only covers writes made outside the app.
+cache = Cache(create_cache_backend(), default_ttl=int(os.getenv('CACHE_DEFAULT_TTL', 300)))
+
+
+def make_key(name, *args, **kwargs):
+    parts = [name] + [repr(arg) for arg in args]
+    parts += [f'{k}={v!r}' for k, v in sorted(kwargs.items())]
+    return ':'.join(parts)
+
+
+def cached(name, tags=(), ttl=None):
+    """
+    Cache a read function's result in the shared cache, keyed by its arguments.
+    Results are shared between callers and must be treated as read-only.
+
+        @staticmethod
+        @cached('categories:all', tags=('categories',))
+        def get_all():
+            ...
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = make_key(name, *args, **kwargs)
+            hit, value, versions = cache.lookup(key, tags)
+            if not hit:
+                value = f(*args, **kwargs)
+                # No versions means the lookup failed: the value's freshness is unknown, don't store it
+                if versions is not None:
+                    cache.set(key, value, ttl, tags, versions)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidate_tags(*tags):
+    """Drop every cached entry carrying any of the given tags"""
+    try:
+        cache.invalidate_tags(*tags)
+    except Exception as e:
+        print(f"Cache invalidation failed for {tags}: {e}")
@@ -0,0 +1,119 @@
+from flask import request
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_LEVEL = int(os.getenv('COMPRESS_BROTLI_LEVEL', 5))
+
+# Text formats only: JPEG/PNG/WebP images are already compressed
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+}
+
+
+def _choose_encoding():
+    """Pick the best encoding the client accepts: brotli (if installed), then gzip"""
+    accept = request.accept_encodings
+    gzip_quality = accept.quality('gzip')
+    if brotli is not None:
+        br_quality = accept.quality('br')
+        if br_quality > 0 and br_quality >= gzip_quality:
+            return 'br'
+    if gzip_quality > 0:
+        return 'gzip'
+    return None
+
+
+def _compressor(encoding):
+    """Return (process, finish) callables of an incremental compressor"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_LEVEL)
+        return compressor.process, compressor.finish
+    # wbits=31 writes a gzip header and trailer
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def _compress_stream(chunks, encoding):
+    process, finish = _compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def _should_compress(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return True
+
+
+def compress_response(response):
+    """
+    after_request hook: gzip/brotli-encode text responses the client accepts.
+
+    Buffered bodies (API JSON) are compressed in one go once they reach
+    COMPRESS_MIN_SIZE. Streamed and file responses (static SVG/HTML) are
+    compressed chunk by chunk while they are sent, so they are never read
+    fully into memory.
+    """
+    if not _should_compress(response):
+        return response
+
+    # Caches must keep compressed and plain variants apart
+    response.vary.add('Accept-Encoding')
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed or response.direct_passthrough:
+        length = response.content_length
+        if length is not None and length < COMPRESS_MIN_SIZE:
+            return response
+
+        original = response.response
+        if hasattr(original, 'close'):
+            response.call_on_close(original.close)
+        response.response = _compress_stream(response.iter_encoded(), encoding)
+        response.direct_passthrough = False
+        # Byte ranges would refer to the uncompressed file
+        response.headers.pop('Accept-Ranges', None)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        process, finish = _compressor(encoding)
+        response.set_data(process(data) + finish())
+
+    response.headers['Content-Encoding'] = encoding
+
+    # The encoded bytes differ, so a strong ETag becomes weak (If-None-Match still matches it)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
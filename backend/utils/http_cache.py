@@ -0,0 +1,112 @@
+from flask import Response, jsonify, make_response, request
+from functools import wraps
+from utils.cache import cache, make_key
+import hashlib
+import os
+
+# Seconds browsers / proxies may reuse a public catalog response before revalidating
+PUBLIC_MAX_AGE = int(os.getenv('PUBLIC_CACHE_MAX_AGE', 60))
+
+# Upper bound for ?limit= on paginated listings
+MAX_PAGE_LIMIT = int(os.getenv('MAX_PAGE_LIMIT', 100))
+
+
+def make_etag(body):
+    """Strong ETag for a serialized response body"""
+    return hashlib.sha256(body).hexdigest()
+
+
+def conditional_response(body, etag, max_age=None, mimetype='application/json'):
+    """
+    Build a response for an already serialized body.
+    Returns 304 Not Modified when the request's If-None-Match matches.
+    """
+    max_age = PUBLIC_MAX_AGE if max_age is None else max_age
+
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return response.make_conditional(request)
+
+
+def conditional_json(payload, max_age=None):
+    """jsonify() with a content-hash ETag, Cache-Control and If-None-Match support"""
+    body = jsonify(payload).get_data()
+    return conditional_response(body, make_etag(body), max_age)
+
+
+def _int_arg(name, default, minimum=None, maximum=None):
+    try:
+        value = int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    if minimum is not None:
+        value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+def listing_args():
+    """
+    Normalized query args of the paginated listing endpoints.
+    Views read their arguments from here so the response cache key and the
+    data actually served can never disagree.
+    """
+    return {
+        'category_id': request.args.get('category_id') or None,
+        'page': _int_arg('page', 1, minimum=1),
+        'limit': _int_arg('limit', 10, minimum=1, maximum=MAX_PAGE_LIMIT),
+        'cursor': request.args.get('cursor'),
+        'include_total': request.args.get('include_total', 'false').lower() == 'true'
+    }
+
+
+def _max_age(ttl):
+    """Browser max-age for a cached route: never longer than the server-side TTL"""
+    if ttl is None:
+        return PUBLIC_MAX_AGE
+    return min(PUBLIC_MAX_AGE, ttl)
+
+
+def cached_response(name, tags=(), ttl=None, key_args=None):
+    """
+    Cache a public GET view's serialized 200 response (bytes + ETag).
+    Hits are answered straight from the cache without touching the models or
+    jsonify, and still honour If-None-Match.
+
+    key_args: optional callable returning the normalized query args that vary
+    the response; any other query args are ignored for caching.
+
+    tags: a tuple, or a callable taking the view's URL arguments for entries
+    that are invalidated per row (e.g. `lambda product_id: (f'product:{product_id}',)`).
+
+        @products_bp.route('/lightweight', methods=['GET'])
+        @cached_response('products:lightweight', tags=('products',), key_args=listing_args)
+        def get_products_lightweight():
+            ...
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            params = key_args() if key_args else {}
+            key = make_key(f'response:{name}', *sorted(kwargs.items()), *sorted(params.items()))
+            entry_tags = tags(**kwargs) if callable(tags) else tags
+
+            hit, entry, versions = cache.lookup(key, entry_tags)
+            if hit:
+                body, etag = entry
+                return conditional_response(body, etag, _max_age(ttl))
+
+            response = make_response(f(*args, **kwargs))
+            # Errors and bodiless 304s are never cached
+            if response.status_code == 200 and not response.is_streamed:
+                body = response.get_data()
+                etag = response.get_etag()[0] or make_etag(body)
+                # No versions means the lookup failed, so the body's freshness is unknown
+                if versions is not None:
+                    cache.set(key, (body, etag), ttl, entry_tags, versions)
+                return conditional_response(body, etag, _max_age(ttl))
+            return response
+        return wrapper
+    return decorator
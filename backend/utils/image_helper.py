@@ -1,6 +1,20 @@
 import os
+import re
+import hashlib
+import time
+import uuid
 from pathlib import Path
 from werkzeug.utils import secure_filename
+from config.database import get_db_connection
+from models.image_sequence import ImageSequence
+from utils.image_variants import delete_variant_files
+from utils.static_files import content_address
+
+# 'organized' keeps category/barcode folders; 'content' stores each distinct file once under its sha256
+IMAGE_STORAGE_MODE = os.getenv('IMAGE_STORAGE_MODE', 'organized').lower()
+
+# A content-addressed file re-uploaded this recently is never deleted (its new row may not exist yet)
+CONTENT_DELETE_GRACE = int(os.getenv('IMAGE_CONTENT_DELETE_GRACE', 300))
 
 def get_product_images(image_folder_path):
     """
@@ -74,14 +88,91 @@ def get_product_images(image_folder_path):
         'all_images': all_images
     }
 
-def save_uploaded_image(file, filename, category_name=None, product_name=None, barcode=None, image_type='product'):
+def save_content_addressed_image(file, filename):
+    """
+    Store an upload as content/ab/cd/<sha256>.<ext>.
+    Identical bytes map to the same file, so re-uploading a photo
+    (for another product, a banner or the gallery) costs no extra disk space.
+    Returns the path relative to the static folder.
+    """
+    static_path = Path(__file__).parent.parent / 'static'
+    content_root = static_path / 'content'
+    content_root.mkdir(parents=True, exist_ok=True)
+    
+    file_extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'jpg'
+    
+    # Hash while writing so the upload is read only once
+    digest = hashlib.sha256()
+    tmp_path = content_root / f".upload-{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as out:
+        for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+            digest.update(chunk)
+            out.write(chunk)
+    
+    content_hash = digest.hexdigest()
+    relative_path = f"content/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.{file_extension}"
+    file_path = static_path / relative_path
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    if file_path.exists():
+        # Already stored: keep the existing file and mark it as just used
+        tmp_path.unlink()
+        os.utime(file_path)
+    else:
+        os.replace(tmp_path, file_path)
+    
+    return relative_path
+
+def count_image_references(image_name):
+    """Number of product_images, banners and gallery rows pointing at an image file"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute('''
+        SELECT (SELECT COUNT(*) FROM product_images WHERE image_name = %s)
+             + (SELECT COUNT(*) FROM banners WHERE image_name = %s)
+             + (SELECT COUNT(*) FROM gallery WHERE image_name = %s) AS refs
+    ''', (image_name, image_name, image_name))
+    refs = cur.fetchone()['refs']
+    cur.close()
+    conn.close()
+    return refs
+
+def _highest_image_number(folder_path, prefix):
+    """Highest NN among existing prefix-NN.ext files; only used to seed a folder's sequence"""
+    pattern = re.compile(re.escape(prefix) + r'-(\d+)\.[^.]+$')
+    highest = 0
+    if folder_path.is_dir():
+        for file in folder_path.iterdir():
+            match = pattern.match(file.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+    return highest
+
+def reserve_product_image_numbers(category_name, barcode, count=1):
+    """
+    Reserve `count` image numbers in a product folder in one atomic step,
+    so concurrent and bulk uploads never pick the same filename.
+    Content-addressed storage needs no numbers and gets [None] * count.
+    """
+    if IMAGE_STORAGE_MODE == 'content':
+        return [None] * count
+    
+    static_path = Path(__file__).parent.parent / 'static'
+    folder = f"product_images/{secure_filename(category_name)}/{secure_filename(barcode)}"
+    prefix = f"{secure_filename(category_name)}-{barcode}"
+    return list(ImageSequence.reserve(folder, count, seed=lambda: _highest_image_number(static_path / folder, prefix)))
+
+def save_uploaded_image(file, filename, category_name=None, product_name=None, barcode=None, image_type='product', image_number=None):
     """
     Save an uploaded image file to the static directory with organized folder structure
+    (or content-addressed when IMAGE_STORAGE_MODE=content)
     Returns the saved filename with path
     """
-    import uuid
     from datetime import datetime
     
+    if IMAGE_STORAGE_MODE == 'content':
+        return save_content_addressed_image(file, filename)
+    
     # Ensure the static directory exists
     static_path = Path(__file__).parent.parent / 'static'
     static_path.mkdir(exist_ok=True)
@@ -109,9 +200,9 @@ def save_uploaded_image(file, filename, category_name=None, product_name=None, b
         folder_path = static_path / 'product_images' / secure_filename(category_name) / secure_filename(barcode)
         folder_path.mkdir(parents=True, exist_ok=True)
         
-        # Count existing images to get image number
-        existing_images = list(folder_path.glob(f"{secure_filename(category_name)}-{barcode}-*.{file_extension}"))
-        image_number = len(existing_images) + 1
+        # Next number from the folder's sequence (bulk uploads pass a pre-reserved one)
+        if image_number is None:
+            image_number = reserve_product_image_numbers(category_name, barcode)[0]
         
         # Generate filename: category-barcode-imagenumber.ext
         new_filename = f"{secure_filename(category_name)}-{barcode}-{image_number:02d}.{file_extension}"
@@ -143,7 +234,13 @@ def save_uploaded_image(file, filename, category_name=None, product_name=None, b
         relative_path = new_filename
     
     # Save the file
-    file.save(str(file_path))
+    if image_type == 'gallery':
+        # Gallery files keep the caller's name: never replace an existing one,
+        # raise FileExistsError so the caller can pick another name
+        with open(file_path, 'xb') as out:
+            file.save(out)
+    else:
+        file.save(str(file_path))
     
     return relative_path
 
@@ -151,6 +248,7 @@ def delete_image_file(filename):
     """
     Delete an image file from the static directory
     Handles both old flat structure and new organized structure
+    Call it after deleting the record that referenced the file
     """
     if not filename:
         return
@@ -158,6 +256,18 @@ def delete_image_file(filename):
     try:
         static_path = Path(__file__).parent.parent / 'static'
         
+        # Content-addressed files are shared: only the last reference removes them.
+        # Callers delete their row first, so the count excludes it.
+        if content_address(filename):
+            refs = count_image_references(filename)
+            if refs > 0:
+                print(f"Kept image file {filename}: still used by {refs} record(s)")
+                return
+            file_path = static_path / filename
+            if file_path.exists() and time.time() - file_path.stat().st_mtime < CONTENT_DELETE_GRACE:
+                print(f"Kept image file {filename}: re-uploaded recently")
+                return
+        
         # Handle both relative paths and simple filenames
         if '/' in filename or '\\' in filename:
             # It's a relative path from static folder
@@ -169,5 +279,8 @@ def delete_image_file(filename):
         if file_path.exists() and file_path.is_file():
             file_path.unlink()
             print(f"Deleted image file: {filename}")
+        
+        # Resized / WebP copies generated at upload time
+        delete_variant_files(filename)
     except Exception as e:
         print(f"Error deleting image file {filename}: {e}")
\ No newline at end of file
@@ -0,0 +1,198 @@
+from utils.static_files import STATIC_ROOT, content_address, resolve_static_path, static_url
+import os
+import re
+import uuid
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+# Resized widths generated for every uploaded image (never larger than the original)
+VARIANT_WIDTHS = sorted({int(w) for w in os.getenv('IMAGE_VARIANT_WIDTHS', '320,640,1024').split(',') if w.strip()})
+VARIANT_QUALITY = int(os.getenv('IMAGE_VARIANT_QUALITY', 80))
+VARIANT_AVIF = os.getenv('IMAGE_VARIANT_AVIF', 'true').lower() == 'true'
+
+# Variants live next to the original: product_images/Cat/BC/_variants/Cat-BC-01-320.webp
+VARIANT_FOLDER = '_variants'
+
+EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'webp': 'webp', 'avif': 'avif'}
+
+
+def _avif_supported():
+    try:
+        return features.check('avif')
+    except Exception:
+        return False
+
+
+def variant_formats(has_alpha=False):
+    """Formats written for each width: a JPEG/PNG fallback, WebP and (if Pillow supports it) AVIF"""
+    formats = ['png' if has_alpha else 'jpeg', 'webp']
+    if VARIANT_AVIF and Image is not None and _avif_supported():
+        formats.append('avif')
+    return formats
+
+
+def _variant_path(image_name, width, fmt):
+    folder, filename = os.path.split(image_name.replace('\\', '/'))
+    stem = os.path.splitext(filename)[0]
+    return '/'.join(part for part in (folder, VARIANT_FOLDER, f'{stem}-{width}.{EXTENSIONS[fmt]}') if part)
+
+
+def _save(img, path, fmt):
+    """Write atomically so a half-written variant is never served"""
+    target = STATIC_ROOT / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name: two jobs for the same shared file may run at once
+    tmp = target.with_name(f'{target.name}.{uuid.uuid4().hex}.tmp')
+
+    options = {'quality': VARIANT_QUALITY}
+    if fmt == 'jpeg':
+        img = img.convert('RGB')
+        options.update(optimize=True, progressive=True)
+    elif fmt == 'png':
+        options = {'optimize': True}
+    elif fmt == 'webp':
+        options['method'] = 4
+
+    # No exif= argument: camera metadata (GPS, serial numbers) is stripped
+    img.save(tmp, format=fmt.upper(), **options)
+    os.replace(tmp, target)
+
+
+def generate_variants(image_name):
+    """
+    Create resized JPEG/PNG, WebP and AVIF copies of a static image.
+    Returns the description stored in the row's `variants` column:
+
+        {'width': 1600, 'height': 1200,
+         'sources': [{'width': 320, 'format': 'webp', 'path': '.../_variants/x-320.webp'}, ...]}
+
+    Returns None when Pillow is missing or the file can't be decoded, in
+    which case the original image is simply served on its own.
+    """
+    if Image is None or not image_name:
+        return None
+
+    source = resolve_static_path(image_name)
+    if source is None:
+        return None
+
+    try:
+        with Image.open(source) as opened:
+            # Apply the camera rotation before the EXIF data is dropped
+            img = ImageOps.exif_transpose(opened)
+            img.load()
+    except Exception as e:
+        print(f"Could not decode image {image_name}: {e}")
+        return None
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    formats = variant_formats(has_alpha)
+    fallback = formats[0]
+    widths = [w for w in VARIANT_WIDTHS if w < img.width]
+
+    sources = []
+    try:
+        for width in widths + [img.width]:
+            if width == img.width:
+                resized = img
+            else:
+                resized = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+            for fmt in formats:
+                # The original already is the full-width fallback
+                if width == img.width and fmt == fallback:
+                    continue
+                path = _variant_path(image_name, width, fmt)
+                _save(resized, path, fmt)
+                sources.append({'width': width, 'format': fmt, 'path': path})
+    except Exception as e:
+        print(f"Error generating variants for {image_name}: {e}")
+        delete_variant_files(image_name)
+        return None
+
+    return {'width': img.width, 'height': img.height, 'fallback': fallback, 'sources': sources}
+
+
+def strip_metadata(image_name):
+    """
+    Rewrite an original that carries EXIF data (GPS position, camera serials)
+    without it, applying its rotation first so it still displays upright.
+    """
+    path = resolve_static_path(image_name)
+    with Image.open(path) as opened:
+        if not opened.info.get('exif') or opened.format not in ('JPEG', 'PNG', 'WEBP'):
+            return False
+        fmt = opened.format
+        img = ImageOps.exif_transpose(opened)
+        img.load()
+
+    options = {'quality': 90, 'optimize': True} if fmt == 'JPEG' else {}
+    tmp = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+    img.save(tmp, format=fmt, **options)
+    os.replace(tmp, path)
+    return True
+
+
+def process_image(image_name):
+    """
+    Full processing of one upload, run by the image worker processes:
+    strip metadata from the original, then write the variants (which
+    never carry metadata).
+    Raises on failure so the job is retried.
+    """
+    if Image is None:
+        raise RuntimeError("Image processing requires Pillow (pip install Pillow)")
+    if resolve_static_path(image_name) is None:
+        raise FileNotFoundError(f"Image not found: {image_name}")
+
+    # A content-addressed file must keep the bytes its name is the hash of
+    if not content_address(image_name):
+        strip_metadata(image_name)
+    variants = generate_variants(image_name)
+    if variants is None:
+        raise RuntimeError(f"Could not generate variants for {image_name}")
+    return variants
+
+
+def delete_variant_files(image_name):
+    """Remove every variant generated for an image"""
+    if not image_name:
+        return
+    folder, filename = os.path.split(image_name.replace('\\', '/'))
+    variant_dir = STATIC_ROOT / folder / VARIANT_FOLDER
+    if not variant_dir.is_dir():
+        return
+
+    pattern = re.compile(re.escape(os.path.splitext(filename)[0]) + r'-\d+\.(jpg|png|webp|avif)$')
+    for path in variant_dir.iterdir():
+        if pattern.match(path.name):
+            try:
+                path.unlink()
+            except OSError as e:
+                print(f"Error deleting variant {path}: {e}")
+
+
+def build_srcset(image_name, variants):
+    """
+    srcset strings per format, e.g.
+    {'webp': 'a-320.webp?v=.. 320w, a-640.webp?v=.. 640w', 'jpeg': '...'}.
+    The fallback format ends with the original image at its full width.
+    Returns None for images without variants.
+    """
+    if not variants or not variants.get('sources'):
+        return None
+
+    candidates = {}
+    for source in variants['sources']:
+        candidates.setdefault(source['format'], []).append((source['width'], source['path']))
+    candidates.setdefault(variants.get('fallback', 'jpeg'), []).append((variants['width'], image_name))
+
+    return {
+        fmt: ', '.join(f'{static_url(path)} {width}w' for width, path in sorted(entries))
+        for fmt, entries in candidates.items()
+    }
@@ -0,0 +1,179 @@
+from config.database import get_db_connection
+
+
+class JobQueue:
+    """
+    Work queue stored in a PostgreSQL table.
+
+    The table needs the columns id, status, attempts, max_attempts, run_at,
+    locked_at, last_error and updated_at. Any number of workers can claim
+    from it concurrently: FOR UPDATE SKIP LOCKED hands every job to exactly
+    one of them. Failed jobs are retried with exponential backoff until
+    max_attempts, and jobs left 'running' by a crashed worker are claimed
+    again after `lock_timeout` seconds. Such a stale job that has already
+    used its last attempt is marked 'failed' instead, so a job that keeps
+    crashing or hanging its worker is not retried forever.
+    """
+
+    def __init__(self, table, backoff=30, max_backoff=3600, lock_timeout=600):
+        self.table = table
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock_timeout = lock_timeout
+
+    def claim(self, limit=1):
+        """Lock up to `limit` due jobs for this worker and return them"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            # Stale jobs out of attempts: their worker died or hung on the last one
+            cur.execute(f'''
+                UPDATE {self.table}
+                SET status = 'failed', locked_at = NULL, updated_at = CURRENT_TIMESTAMP,
+                    last_error = COALESCE(last_error || ' / ', '') || 'Worker stopped during the last attempt'
+                WHERE id IN (
+                    SELECT id FROM {self.table}
+                    WHERE status = 'running' AND attempts >= max_attempts
+                      AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+                    FOR UPDATE SKIP LOCKED
+                )
+            ''', (self.lock_timeout,))
+            cur.execute(f'''
+                UPDATE {self.table}
+                SET status = 'running', attempts = attempts + 1,
+                    locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM {self.table}
+                    WHERE (status = 'pending' AND run_at <= CURRENT_TIMESTAMP)
+                       OR (status = 'running' AND attempts < max_attempts
+                           AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+                    ORDER BY run_at, id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+            ''', (self.lock_timeout, limit))
+            jobs = cur.fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+        return jobs
+
+    def complete(self, job_id, apply=None):
+        """
+        Mark a job done. `apply(cur)` runs in the same transaction, so the
+        job's result and its completion are committed together.
+        """
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            if apply is not None:
+                apply(cur)
+            cur.execute(f'''
+                UPDATE {self.table}
+                SET status = 'done', locked_at = NULL, last_error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            ''', (job_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+    def fail(self, job, error):
+        """Schedule a retry with exponential backoff, or give up after max_attempts"""
+        delay = min(self.backoff * 2 ** max(job['attempts'] - 1, 0), self.max_backoff)
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(f'''
+            UPDATE {self.table}
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                run_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                locked_at = NULL, last_error = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING status
+        ''', (delay, str(error)[:1000], job['id']))
+        row = cur.fetchone()
+        conn.commit()
+        cur.close()
+        conn.close()
+        return row['status'] if row else None
+
+    def retry(self, job_id):
+        """Put a failed job back in the queue with a fresh set of attempts"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(f'''
+            UPDATE {self.table}
+            SET status = 'pending', attempts = 0, run_at = CURRENT_TIMESTAMP,
+                locked_at = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = 'failed'
+        ''', (job_id,))
+        retried = cur.rowcount > 0
+        conn.commit()
+        cur.close()
+        conn.close()
+        return retried
+
+    def prune(self, days, batch_size=1000):
+        """
+        Delete done and failed jobs last updated more than `days` days ago.
+        Deletes in batches of `batch_size`, one short transaction each, and
+        returns the number of rows removed.
+        """
+        removed = 0
+        while True:
+            conn = get_db_connection()
+            cur = conn.cursor()
+            cur.execute(f'''
+                DELETE FROM {self.table}
+                WHERE id IN (
+                    SELECT id FROM {self.table}
+                    WHERE status IN ('done', 'failed')
+                      AND updated_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+                    LIMIT %s
+                )
+            ''', (days, batch_size))
+            deleted = cur.rowcount
+            conn.commit()
+            cur.close()
+            conn.close()
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+
+    def get_many(self, job_ids):
+        if not job_ids:
+            return []
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(f'SELECT * FROM {self.table} WHERE id = ANY(%s) ORDER BY id', (list(job_ids),))
+        jobs = cur.fetchall()
+        cur.close()
+        conn.close()
+        return jobs
+
+    def stats(self):
+        """Job counts per status plus the age of the oldest due job"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(f'SELECT status, COUNT(*) AS count FROM {self.table} GROUP BY status')
+        counts = {row['status']: row['count'] for row in cur.fetchall()}
+        cur.execute(f'''
+            SELECT EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(run_at)) AS oldest_pending_seconds
+            FROM {self.table}
+            WHERE status = 'pending' AND run_at <= CURRENT_TIMESTAMP
+        ''')
+        oldest = cur.fetchone()['oldest_pending_seconds']
+        cur.close()
+        conn.close()
+
+        stats = {status: counts.get(status, 0) for status in ('pending', 'running', 'done', 'failed')}
+        stats['oldest_pending_seconds'] = float(oldest) if oldest is not None else 0.0
+        return stats
@@ -0,0 +1,63 @@
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for jsonify() and every JSON response.
+
+    Produces the same documents as Flask's default provider (sorted keys,
+    Decimal as string, datetimes as HTTP dates) but encodes with orjson
+    when it is installed. orjson walks RealDictRow results and their JSONB
+    values directly and writes UTF-8 bytes, so large catalog and order
+    payloads skip the str round trip of the stdlib encoder. Non-ASCII text
+    is written as UTF-8 instead of \\u escapes.
+    Without orjson (or with JSON_BACKEND=json) it falls back to the stdlib path.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and os.getenv('JSON_BACKEND', 'orjson').lower() == 'orjson'
+
+    def _orjson_options(self, indent=False):
+        # Datetimes go through default() so they keep Flask's HTTP date format
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize to UTF-8 bytes without an intermediate str"""
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+        return self._stdlib_dumps(obj, indent).encode('utf-8')
+
+    def _stdlib_dumps(self, obj, indent=False):
+        if indent:
+            return super().dumps(obj, indent=2)
+        return super().dumps(obj, separators=(',', ':'))
+
+    def dumps(self, obj, **kwargs):
+        # Custom json.dumps arguments are only understood by the stdlib encoder
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,127 @@
+from flask import abort, current_app, request, send_file
+from pathlib import Path
+from werkzeug.security import safe_join
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+STATIC_ROOT = Path(__file__).parent.parent / 'static'
+
+# Unversioned URLs are reused for this long before revalidating with the ETag
+STATIC_MAX_AGE = int(os.getenv('STATIC_CACHE_MAX_AGE', 3600))
+
+# URLs carrying the file's current content hash (?v=...) never change
+IMMUTABLE_MAX_AGE = 31536000
+
+# '' serves files from Python; 'x-accel' (nginx) or 'x-sendfile' (Apache/lighttpd) hands them to the front proxy
+STATIC_SENDFILE_MODE = os.getenv('STATIC_SENDFILE_MODE', '').lower()
+
+# nginx `internal` location aliased to the static folder, used with x-accel
+STATIC_ACCEL_PREFIX = os.getenv('STATIC_ACCEL_PREFIX', '/protected-static').rstrip('/')
+
+# Content-addressed uploads (IMAGE_STORAGE_MODE=content): content/ab/cd/<sha256>.<ext>
+CONTENT_PATH_RE = re.compile(r'^content/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$')
+
+_hashes = {}  # path -> (mtime_ns, size, digest)
+_hashes_lock = threading.Lock()
+
+
+def resolve_static_path(filename):
+    """Absolute path of a file inside the static folder, or None if it doesn't exist"""
+    path = safe_join(str(STATIC_ROOT), filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return Path(path)
+
+
+def content_address(filename):
+    """The sha256 a content-addressed path is named after, or None for any other path"""
+    match = CONTENT_PATH_RE.match(filename.replace('\\', '/')) if filename else None
+    return match.group(1) if match else None
+
+
+def file_hash(path):
+    """
+    Short content hash of a static file.
+    Hashes are remembered per (mtime, size), so each file is read once
+    until it is replaced on disk.
+    """
+    stat = path.stat()
+    key = str(path)
+    with _hashes_lock:
+        cached = _hashes.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    digest = digest.hexdigest()[:16]
+
+    with _hashes_lock:
+        _hashes[key] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def static_url(filename):
+    """
+    Path of a static file with its content hash appended (product_images/a.jpg?v=1f2e...),
+    so browsers and CDNs may cache it forever. Missing files are returned unchanged.
+    """
+    if not filename:
+        return filename
+    # The name already changes whenever the content does
+    if content_address(filename):
+        return filename
+    path = resolve_static_path(filename)
+    if path is None:
+        return filename
+    try:
+        return f'{filename}?v={file_hash(path)}'
+    except OSError:
+        return filename
+
+
+def _set_cache_headers(response, digest, immutable=False):
+    if immutable or request.args.get('v') == digest:
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        # Unversioned (or outdated ?v=) URL: the content may change under it
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+
+
+def serve_static_file(filename):
+    """
+    Serve a file from the static folder with a content-hash ETag,
+    If-None-Match / If-Modified-Since and Range support.
+    With STATIC_SENDFILE_MODE set, only headers are produced here and the
+    front proxy streams the bytes, so no app worker is tied up sending images.
+    """
+    path = resolve_static_path(filename)
+    if path is None:
+        abort(404)
+
+    # Content-addressed files never change, so they need no hashing and are always immutable
+    address = content_address(filename)
+    immutable = address is not None
+    digest = address[:16] if immutable else file_hash(path)
+
+    if STATIC_SENDFILE_MODE in ('x-accel', 'x-sendfile'):
+        mimetype = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        if STATIC_SENDFILE_MODE == 'x-accel':
+            response.headers['X-Accel-Redirect'] = f'{STATIC_ACCEL_PREFIX}/{filename}'
+        else:
+            response.headers['X-Sendfile'] = str(path.resolve())
+        response.set_etag(digest)
+        response.last_modified = path.stat().st_mtime
+        _set_cache_headers(response, digest, immutable)
+        # 304s are answered here; ranges and the body are left to the proxy
+        return response.make_conditional(request)
+
+    response = send_file(path, conditional=True, etag=digest)
+    _set_cache_headers(response, digest, immutable)
+    return response
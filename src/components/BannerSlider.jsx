@@ -1,9 +1,9 @@
 import { useState, useEffect } from 'react';
-import { getBackendUrl, getImageUrl } from '../utils/config';
+import { getImageUrl } from '../utils/config';
 import { useHomePage } from '../context/HomePageContext';
 
 function BannerSlider() {
-  const { banners: cachedBanners, isCached, cacheBanners } = useHomePage();
+  const { banners: cachedBanners, isCached, cacheBanners, loadHomePage } = useHomePage();
   const [currentSlide, setCurrentSlide] = useState(0);
   const [banners, setBanners] = useState(cachedBanners);
   const [loading, setLoading] = useState(!isCached);
@@ -21,10 +21,8 @@ function BannerSlider() {
 
   const loadBanners = async () => {
     try {
-      const response = await fetch(`${getBackendUrl()}/banners/`);
-      const data = await response.json();
+      const { banners: data } = await loadHomePage(); // Cached for future visits
       setBanners(data);
-      cacheBanners(data); // Cache for future visits
     } catch (error) {
       console.error('Failed to load banners:', error);
       // Fallback to default banners
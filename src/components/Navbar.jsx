@@ -1,13 +1,14 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useCart } from '../context/CartContext';
-import { getBackendUrl } from '../utils/config';
+import { useHomePage } from '../context/HomePageContext';
 
 function Navbar() {
   const [isOpen, setIsOpen] = useState(false);
   const [isDropdownOpen, setIsDropdownOpen] = useState(false);
   const [categories, setCategories] = useState([]);
   const { cart } = useCart();
+  const { categories: cachedCategories, loadHomePage } = useHomePage();
 
   useEffect(() => {
     loadCategories();
@@ -15,8 +16,8 @@ function Navbar() {
 
   const loadCategories = async () => {
     try {
-      const response = await fetch(`${getBackendUrl()}/categories/`);
-      const data = await response.json();
+      // Categories arrive with the shared /home payload
+      const data = cachedCategories.length > 0 ? cachedCategories : (await loadHomePage()).categories;
       setCategories(data.map(category => ({
         name: category.name,
         path: `/category/${category.slug}`
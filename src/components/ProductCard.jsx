@@ -1,6 +1,7 @@
 import React from 'react';
 import { Link, useLocation } from 'react-router-dom';
-import { getImageUrl, formatPrice } from '../utils/config';
+import { formatPrice } from '../utils/config';
+import ResponsiveImage from './ResponsiveImage';
 import { useHomePage } from '../context/HomePageContext';
 
 const ProductCard = ({ product }) => {
@@ -28,11 +29,15 @@ const ProductCard = ({ product }) => {
           {/* Product Image */}
           <div className="aspect-w-1 aspect-h-1 w-full h-64 bg-gray-200">
             {product.main_image ? (
-              <img
-                src={getImageUrl(product.main_image)}
+              <ResponsiveImage
+                src={product.main_image}
+                srcset={product.main_image_srcset}
+                sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
                 alt={product.name}
                 className="w-full h-full object-cover"
+                loading="lazy"
                 onError={(e) => {
+                  e.target.srcset = '';
                   e.target.src = '/placeholder-product.jpg';
                 }}
               />
@@ -0,0 +1,33 @@
+import React from 'react';
+import { getImageUrl, getSrcSet } from '../utils/config';
+
+// Modern formats first; the browser picks the first one it supports
+const SOURCE_TYPES = [
+  ['avif', 'image/avif'],
+  ['webp', 'image/webp'],
+];
+
+const ResponsiveImage = ({ src, srcset, sizes, ...imgProps }) => {
+  // Images uploaded before variants existed have no srcset
+  if (!srcset) {
+    return <img src={getImageUrl(src)} {...imgProps} />;
+  }
+
+  const fallback = srcset.jpeg || srcset.png;
+
+  return (
+    <picture className="contents">
+      {SOURCE_TYPES.filter(([format]) => srcset[format]).map(([format, type]) => (
+        <source key={format} type={type} srcSet={getSrcSet(srcset[format])} sizes={sizes} />
+      ))}
+      <img
+        src={getImageUrl(src)}
+        srcSet={fallback ? getSrcSet(fallback) : undefined}
+        sizes={sizes}
+        {...imgProps}
+      />
+    </picture>
+  );
+};
+
+export default ResponsiveImage;
@@ -1,14 +1,17 @@
-import { createContext, useContext, useState, useRef } from 'react';
+import { createContext, useContext, useState, useRef, useCallback } from 'react';
+import { api } from '../services/api';
 
 const HomePageContext = createContext();
 
 export function HomePageProvider({ children }) {
   const [featuredProducts, setFeaturedProducts] = useState([]);
   const [banners, setBanners] = useState([]);
+  const [categories, setCategories] = useState([]);
   const [cachedProducts, setCachedProducts] = useState({}); // Store products by ID
   const [cachedCategories, setCachedCategories] = useState({}); // Store category data by slug+page
   const [isCached, setIsCached] = useState(false);
   const scrollPositions = useRef({}); // Store scroll positions by route
+  const homePageRequest = useRef(null); // Shared in-flight /home request
 
   const cacheFeaturedProducts = (products) => {
     setFeaturedProducts(products);
@@ -19,6 +22,27 @@ export function HomePageProvider({ children }) {
     setBanners(bannersData);
   };
 
+  // Banners, featured products and categories come from one /home request,
+  // shared by every component that asks for them. Stable across renders, so
+  // effects that depend on it don't re-run on every provider update.
+  const loadHomePage = useCallback(() => {
+    if (!homePageRequest.current) {
+      homePageRequest.current = api.getHomePage()
+        .then((data) => {
+          setBanners(data.banners);
+          setCategories(data.categories);
+          setFeaturedProducts(data.featured_products);
+          setIsCached(true);
+          return data;
+        })
+        .catch((error) => {
+          homePageRequest.current = null;
+          throw error;
+        });
+    }
+    return homePageRequest.current;
+  }, []);
+
   const cacheProduct = (productId, productData) => {
     setCachedProducts(prev => ({
       ...prev,
@@ -54,10 +78,12 @@ export function HomePageProvider({ children }) {
   const clearCache = () => {
     setFeaturedProducts([]);
     setBanners([]);
+    setCategories([]);
     setCachedProducts({});
     setCachedCategories({});
     setIsCached(false);
     scrollPositions.current = {};
+    homePageRequest.current = null;
   };
 
   return (
@@ -65,9 +91,11 @@ export function HomePageProvider({ children }) {
       value={{
         featuredProducts,
         banners,
+        categories,
         isCached,
         cacheFeaturedProducts,
         cacheBanners,
+        loadHomePage,
         cacheProduct,
         getCachedProduct,
         cacheCategory,
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { api } from '../services/api';
 import { getImageUrl } from '../utils/config';
 import Navbar from '../components/Navbar';
+import ResponsiveImage from '../components/ResponsiveImage';
 import Footer from '../components/Footer';
 import WhatsAppButton from '../components/WhatsAppButton';
 
@@ -144,8 +145,10 @@ function Gallery() {
                 onClick={() => openLightbox(image, index)}
               >
                 <div className="aspect-square overflow-hidden">
-                  <img
-                    src={getImageUrl(image.image_name)}
+                  <ResponsiveImage
+                    src={image.image_name}
+                    srcset={image.srcset}
+                    sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
                     alt={image.alt_text || image.title}
                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-300"
                     loading="lazy"
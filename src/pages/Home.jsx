@@ -4,7 +4,6 @@ import Footer from '../components/Footer';
 import BannerSlider from '../components/BannerSlider';
 import WhatsAppButton from '../components/WhatsAppButton';
 import ProductCard from '../components/ProductCard';
-import { api } from '../services/api';
 import { debugLog } from '../utils/config';
 import { useHomePage } from '../context/HomePageContext';
 
@@ -13,6 +12,7 @@ function Home() {
     featuredProducts: cachedProducts, 
     isCached, 
     cacheFeaturedProducts,
+    loadHomePage,
     saveScrollPosition,
     getScrollPosition 
   } = useHomePage();
@@ -25,7 +25,7 @@ function Home() {
     if (!isCached) {
       const fetchFeaturedProducts = async () => {
         try {
-          const products = await api.getFeaturedProducts();
+          const { featured_products: products } = await loadHomePage();
           
           debugLog('🚀 FRONTEND: Received ONLY featured products from backend');
           debugLog('📊 FRONTEND: Number of featured products received:', products.length);
@@ -39,8 +39,7 @@ function Home() {
           debugLog('📏 FRONTEND: Payload size (approx):', JSON.stringify(products).length, 'characters');
           debugLog('✅ FRONTEND: No filtering needed - backend sent only featured products!');
           
-          setFeaturedProducts(products);
-          cacheFeaturedProducts(products); // Cache for future visits
+          setFeaturedProducts(products); // loadHomePage already cached them for future visits
           setImagesLoaded(true);
         } catch (error) {
           console.error('Error fetching featured products:', error);
@@ -54,7 +53,7 @@ function Home() {
       setFeaturedProducts(cachedProducts);
       setImagesLoaded(true);
     }
-  }, [isCached, cachedProducts, cacheFeaturedProducts]);
+  }, [isCached, cachedProducts, loadHomePage]);
 
   // Restore scroll position after render
   useEffect(() => {
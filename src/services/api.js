@@ -5,6 +5,16 @@ const BACKEND_BASE_URL = import.meta.env.VITE_BACKEND_URL?.replace('/api', '') |
 import { PRODUCTS_PER_PAGE } from '../utils/config';
 
 export const api = {
+  // Home page (banners, featured products and categories in one request)
+  getHomePage: async () => {
+    const response = await fetch(`${API_BASE_URL}/home`);
+    // Don't cache an error body as the home page data
+    if (!response.ok) {
+      throw new Error(`Failed to load home page: ${response.status}`);
+    }
+    return response.json();
+  },
+
   // Categories
   getCategories: async () => {
     const response = await fetch(`${API_BASE_URL}/categories`);
@@ -21,6 +21,18 @@ export const getImageUrl = (imagePath) => {
   return `${getBackendBaseUrl()}/${imagePath}`;
 };
 
+// Turn a backend srcset ("path?v=.. 320w, path?v=.. 640w") into absolute URLs
+export const getSrcSet = (srcset) => {
+  if (!srcset) return undefined;
+  return srcset
+    .split(', ')
+    .map((candidate) => {
+      const [path, width] = candidate.split(' ');
+      return `${getImageUrl(path)} ${width}`;
+    })
+    .join(', ');
+};
+
 // Debug logging utility
 export const debugLog = (...args) => {
   if (import.meta.env.VITE_DEBUG === 'true') {